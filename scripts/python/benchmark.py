@@ -0,0 +1,42 @@
+import os
+import sys
+from src.economics.benchmark import (
+    compare_benchmark,
+    load_benchmark,
+    run_benchmark,
+    save_benchmark,
+)
+
+# Set constants
+prefix = "output/benchmark/"
+os.makedirs(prefix, exist_ok=True)
+
+result_path = os.path.join(prefix, "result.json")
+baseline_path = os.path.join(prefix, "baseline.json")
+threshold = 0.2
+
+# Run benchmark over the default grid of problem sizes
+benchmark = run_benchmark()
+save_benchmark(benchmark=benchmark, path=result_path)
+print(f"Benchmark completed and saved to {result_path}")
+
+# Compare against the stored baseline, if any
+if not os.path.exists(baseline_path):
+    print(f"No baseline at {baseline_path}; copy {result_path} there to create one")
+    sys.exit(0)
+
+regression = compare_benchmark(
+    benchmark=benchmark,
+    baseline=load_benchmark(path=baseline_path),
+    threshold=threshold
+)
+for record in regression:
+    print(
+        f"Regression in {record['function']} at "
+        f"N={record['num_simulation']}, J={record['num_alternative']}, "
+        f"K={record['num_covariate']}, "
+        f"individual={record['individual_covariate']}, "
+        f"backend={record['backend']}: "
+        f"{record['ratio']:.2f}x baseline"
+    )
+sys.exit(1 if regression else 0)
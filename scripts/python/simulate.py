@@ -1,7 +1,7 @@
 import os
 import numpy as np
-import pickle
 from src.economics.simulate import make_equilibrium, simulate_choice
+from src.economics.storage import save_equilibrium
 
 # Set constants
 prefix = "output/simulate/"
@@ -10,10 +10,11 @@ os.makedirs(prefix, exist_ok=True)
 num_simulation = 100
 num_alternative = 3
 num_covariate = 2
+covariate_seed = 1
 seed = 10
 
 # Run simulation
-np.random.seed(1)  # Set seed similar to R's set.seed(1)
+np.random.seed(covariate_seed)  # Set seed similar to R's set.seed(1)
 
 # Create equilibrium structure
 equilibrium = make_equilibrium(
@@ -29,8 +30,16 @@ equilibrium = simulate_choice(
 )
 
 # Save results
-with open(os.path.join(prefix, "equilibrium.pkl"), "wb") as f:
-    pickle.dump(equilibrium, f)
-
-print(f"Simulation completed and saved to {os.path.join(prefix, 'equilibrium.pkl')}")
+save_equilibrium(
+    equilibrium=equilibrium,
+    path=os.path.join(prefix, "equilibrium"),
+    config={
+        "num_simulation": num_simulation,
+        "num_alternative": num_alternative,
+        "num_covariate": num_covariate,
+        "covariate_seed": covariate_seed,
+        "seed": seed
+    }
+)
 
+print(f"Simulation completed and saved to {os.path.join(prefix, 'equilibrium')}")
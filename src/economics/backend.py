@@ -0,0 +1,216 @@
+import importlib.util
+import os
+import numpy as np
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+# Numba is imported on first use of a kernel, since importing it is slow
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+# Environment variable choosing the backend: "auto", "numpy" or "numba"
+BACKEND_ENVIRONMENT = "ECONOMICS_BACKEND"
+
+BACKEND = ("auto", "numpy", "numba")
+
+_backend = os.environ.get(BACKEND_ENVIRONMENT, "auto")
+
+
+def get_backend() -> str:
+    """
+    Get the backend that runs the sampling and likelihood hot paths.
+
+    "auto" and "numba" resolve to "numba" when Numba is installed and to
+    "numpy" otherwise, so code never fails for lack of the optional
+    dependency.
+
+    Returns:
+        "numba" or "numpy"
+    """
+    if _backend != "numpy" and NUMBA_AVAILABLE:
+        return "numba"
+    return "numpy"
+
+
+def set_backend(
+    backend: str
+) -> None:
+    """
+    Choose the backend for the sampling and likelihood hot paths.
+
+    Args:
+        backend: "auto" to use Numba when installed, "numpy", or "numba"
+
+    Raises:
+        ValueError: If backend is not one of BACKEND
+        ImportError: If backend is "numba" and Numba is not installed
+    """
+    global _backend
+    if backend not in BACKEND:
+        raise ValueError(f"backend must be one of {BACKEND}, got {backend!r}")
+    if backend == "numba" and not NUMBA_AVAILABLE:
+        raise ImportError("The numba backend requires the numba package")
+    _backend = backend
+
+
+def sample_individual_choice(
+    covariate: np.ndarray,
+    beta: np.ndarray,
+    uniform: np.ndarray
+) -> np.ndarray:
+    """
+    Sample logit choices of individuals in one fused pass per individual.
+
+    For each individual the kernel computes utilities into a buffer of
+    length num_alternative, exponentiates them relative to their maximum,
+    and returns the first alternative whose running sum exceeds the uniform
+    draw times the total. This is the inverse-CDF rule of the NumPy path
+    without its (num_simulation, num_alternative) temporaries.
+
+    Args:
+        covariate: Tensor of covariates by individual
+        beta: Vector of coefficients
+        uniform: Uniform draws, one per individual
+
+    Returns:
+        Vector of chosen alternative indices
+    """
+    choice: np.ndarray = _get_kernel()["sample_individual_choice"](
+        np.ascontiguousarray(covariate),
+        np.ascontiguousarray(beta, dtype=np.float64).ravel(),
+        np.ascontiguousarray(uniform, dtype=np.float64)
+    )
+    return choice
+
+
+def compute_log_likelihood(
+    covariate: np.ndarray,
+    count: np.ndarray,
+    beta: np.ndarray
+) -> Tuple[float, np.ndarray, np.ndarray]:
+    """
+    Compute the logit log-likelihood, gradient and Hessian in one pass.
+
+    Evaluates the same sums as economics.estimate.compute_log_likelihood,
+    pattern by pattern, without chunk-sized temporaries.
+
+    Args:
+        covariate: Covariates of shape (num_pattern, num_alternative,
+            num_covariate)
+        count: Choice counts of shape (num_pattern, num_alternative)
+        beta: Vector of coefficients
+
+    Returns:
+        Log-likelihood, gradient vector and Hessian matrix
+    """
+    log_likelihood, gradient, hessian = _get_kernel()["compute_log_likelihood"](
+        np.ascontiguousarray(covariate),
+        np.ascontiguousarray(count, dtype=np.float64),
+        np.ascontiguousarray(beta, dtype=np.float64).ravel()
+    )
+    return float(log_likelihood), gradient, hessian
+
+
+@lru_cache(maxsize=None)
+def _get_kernel() -> Dict[str, Any]:
+    """
+    Compile the Numba kernels, importing Numba on first call.
+
+    Returns:
+        Dictionary of jitted kernels by name
+    """
+    import numba
+
+    @numba.njit(parallel=True, nogil=True, cache=True)
+    def _sample_individual_choice(
+        covariate: np.ndarray,
+        beta: np.ndarray,
+        uniform: np.ndarray
+    ) -> np.ndarray:
+        num_simulation, num_alternative, num_covariate = covariate.shape
+        choice = np.empty(num_simulation, dtype=np.int64)
+        for i in numba.prange(num_simulation):
+            utility = np.empty(num_alternative)
+            max_utility = -np.inf
+            for j in range(num_alternative):
+                value = 0.0
+                for k in range(num_covariate):
+                    value += covariate[i, j, k] * beta[k]
+                utility[j] = value
+                if value > max_utility:
+                    max_utility = value
+            total = 0.0
+            for j in range(num_alternative):
+                utility[j] = np.exp(utility[j] - max_utility)
+                total += utility[j]
+            threshold = uniform[i] * total
+            running = 0.0
+            chosen = num_alternative - 1
+            for j in range(num_alternative):
+                running += utility[j]
+                if running > threshold:
+                    chosen = j
+                    break
+            choice[i] = chosen
+        return choice
+
+    @numba.njit(nogil=True, cache=True)
+    def _compute_log_likelihood(
+        covariate: np.ndarray,
+        count: np.ndarray,
+        beta: np.ndarray
+    ) -> Tuple[float, np.ndarray, np.ndarray]:
+        num_pattern, num_alternative, num_covariate = covariate.shape
+        log_likelihood = 0.0
+        # Compensation of the Kahan sum of log-likelihood terms. A plain
+        # running sum drifts by more than a Newton step gains near the
+        # optimum, and step halving in estimate_beta then stalls.
+        compensation = 0.0
+        gradient = np.zeros(num_covariate)
+        hessian = np.zeros((num_covariate, num_covariate))
+        utility = np.empty(num_alternative)
+        mean_covariate = np.empty(num_covariate)
+        for p in range(num_pattern):
+            max_utility = -np.inf
+            total_count = 0.0
+            for j in range(num_alternative):
+                value = 0.0
+                for k in range(num_covariate):
+                    value += covariate[p, j, k] * beta[k]
+                utility[j] = value
+                if value > max_utility:
+                    max_utility = value
+                total_count += count[p, j]
+            sum_exp = 0.0
+            for j in range(num_alternative):
+                sum_exp += np.exp(utility[j] - max_utility)
+            log_sum_exp = max_utility + np.log(sum_exp)
+
+            mean_covariate[:] = 0.0
+            for j in range(num_alternative):
+                log_probability = utility[j] - log_sum_exp
+                probability = np.exp(log_probability)
+                if count[p, j] > 0:
+                    term = count[p, j] * log_probability - compensation
+                    total = log_likelihood + term
+                    compensation = (total - log_likelihood) - term
+                    log_likelihood = total
+                weight = total_count * probability
+                for k in range(num_covariate):
+                    mean_covariate[k] += probability * covariate[p, j, k]
+                    gradient[k] += count[p, j] * covariate[p, j, k]
+                    for m in range(num_covariate):
+                        hessian[k, m] -= (
+                            weight * covariate[p, j, k] * covariate[p, j, m]
+                        )
+            for k in range(num_covariate):
+                gradient[k] -= total_count * mean_covariate[k]
+                for m in range(num_covariate):
+                    hessian[k, m] += (
+                        total_count * mean_covariate[k] * mean_covariate[m]
+                    )
+        return log_likelihood, gradient, hessian
+
+    return {
+        "sample_individual_choice": _sample_individual_choice,
+        "compute_log_likelihood": _compute_log_likelihood
+    }
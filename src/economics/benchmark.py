@@ -0,0 +1,409 @@
+import ctypes
+import gc
+import importlib.metadata
+import itertools
+import json
+import multiprocessing
+import platform
+import statistics
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import backend
+from .simulate import (
+    Equilibrium,
+    compute_choice_probability,
+    compute_utility,
+    make_equilibrium,
+    simulate_choice,
+)
+
+# Problem sizes swept by default
+NUM_SIMULATION = (10**3, 10**5, 10**7, 10**8)
+NUM_ALTERNATIVE = (2, 100, 10**5)
+NUM_COVARIATE = (2, 10)
+INDIVIDUAL_COVARIATE = (False, True)
+
+# Largest individual covariate tensor, in bytes, that a case may allocate
+MAX_COVARIATE_NBYTES = 2**30
+
+# Linux files for the resident set size of a process. Writing 5 to
+# clear_refs resets its peak, VmHWM in status.
+CLEAR_REFS_PATH = "/proc/self/clear_refs"
+STATUS_PATH = "/proc/self/status"
+
+
+def run_benchmark(
+    num_simulation: Sequence[int] = NUM_SIMULATION,
+    num_alternative: Sequence[int] = NUM_ALTERNATIVE,
+    num_covariate: Sequence[int] = NUM_COVARIATE,
+    individual_covariate: Sequence[bool] = INDIVIDUAL_COVARIATE,
+    num_repeat: int = 5,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Time the simulation pipeline over a grid of problem sizes.
+
+    Every combination of sizes runs in a fresh process, so no case sees
+    caches or heap growth left by another. Individual-covariate cases
+    whose tensor would exceed MAX_COVARIATE_NBYTES are skipped. Each case
+    times make_equilibrium, compute_utility, compute_choice_probability,
+    simulate_choice from a cold Equilibrium cache, and simulate_choice
+    again with the cache warm. Timings are the median, minimum and
+    maximum of num_repeat runs. One further run per function measures its
+    peak resident set size, outside the timed runs. Unlike tracemalloc,
+    this also sees memory that Numba kernels and native libraries allocate.
+    Cases run with the current backend, which is recorded with each result,
+    so compare_benchmark never compares a numba run with a numpy baseline.
+
+    Args:
+        num_simulation: Numbers of simulations to sweep
+        num_alternative: Numbers of alternatives to sweep
+        num_covariate: Numbers of covariates to sweep
+        individual_covariate: Whether covariates vary by individual
+        num_repeat: Number of timed runs per function
+        seed: Random seed of covariates and choices
+
+    Returns:
+        Dictionary with machine information and a result list with one
+        record per case and function: sizes, backend and numba version,
+        wall_time (median), min_wall_time and max_wall_time in seconds,
+        throughput in simulations per second (None for work that does not
+        grow with num_simulation), peak_rss in bytes during one call, and
+        peak_nbytes, its rise over the resident set size before the call.
+        Memory is None outside Linux.
+    """
+    context = multiprocessing.get_context("spawn")
+    result = []
+    for case in itertools.product(
+        num_simulation,
+        num_alternative,
+        num_covariate,
+        individual_covariate
+    ):
+        if case[3] and case[0] * case[1] * case[2] * 8 > MAX_COVARIATE_NBYTES:
+            continue
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result.extend(executor.submit(
+                _run_case,
+                num_simulation=case[0],
+                num_alternative=case[1],
+                num_covariate=case[2],
+                individual_covariate=case[3],
+                num_repeat=num_repeat,
+                seed=seed,
+                backend_name=backend.get_backend()
+            ).result())
+
+    benchmark = {
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "backend": backend.get_backend(),
+            "numba": _get_numba_version()
+        },
+        "result": result
+    }
+
+    return benchmark
+
+
+def compare_benchmark(
+    benchmark: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = 0.2
+) -> List[Dict[str, Any]]:
+    """
+    Find cases that got slower than a stored baseline.
+
+    A case regresses when its median wall time grew by more than
+    threshold and its fastest run is slower than the baseline's slowest.
+    Requiring the two ranges to be disjoint keeps timer noise on short
+    cases from being reported.
+
+    Args:
+        benchmark: Result of run_benchmark
+        baseline: Earlier result of run_benchmark on the same machine
+        threshold: Allowed relative increase in median wall time
+
+    Returns:
+        Records present in both runs that regressed, with
+        baseline_wall_time and ratio added
+    """
+    baseline_record = {
+        _get_key(record=record): record
+        for record in baseline["result"]
+    }
+
+    regression = []
+    for record in benchmark["result"]:
+        base = baseline_record.get(_get_key(record=record))
+        if base is None or base["wall_time"] <= 0:
+            continue
+        ratio = record["wall_time"] / base["wall_time"]
+        if (
+            ratio > 1 + threshold
+            and record.get("min_wall_time", record["wall_time"])
+            > base.get("max_wall_time", base["wall_time"])
+        ):
+            regression.append({
+                **record,
+                "baseline_wall_time": base["wall_time"],
+                "ratio": ratio
+            })
+
+    return regression
+
+
+def save_benchmark(
+    benchmark: Dict[str, Any],
+    path: str
+) -> None:
+    """
+    Save a benchmark result as JSON.
+
+    Args:
+        benchmark: Result of run_benchmark
+        path: Output JSON file
+    """
+    with open(path, "w") as f:
+        json.dump(benchmark, f, indent=2)
+
+
+def load_benchmark(
+    path: str
+) -> Dict[str, Any]:
+    """
+    Load a benchmark result saved by save_benchmark.
+
+    Args:
+        path: JSON file written by save_benchmark
+
+    Returns:
+        Benchmark result
+    """
+    with open(path) as f:
+        benchmark: Dict[str, Any] = json.load(f)
+
+    return benchmark
+
+
+def _run_case(
+    num_simulation: int,
+    num_alternative: int,
+    num_covariate: int,
+    individual_covariate: bool,
+    num_repeat: int,
+    seed: int,
+    backend_name: str
+) -> List[Dict[str, Any]]:
+    """
+    Time each pipeline function for one problem size, in a fresh process.
+
+    Args:
+        num_simulation: Number of simulations
+        num_alternative: Number of alternatives
+        num_covariate: Number of covariates
+        individual_covariate: Whether covariates vary by individual
+        num_repeat: Number of timed runs per function
+        seed: Random seed of covariates and choices
+        backend_name: Backend of the parent process, which a spawned
+            process does not inherit when it was set by set_backend
+
+    Returns:
+        One record per function
+    """
+    backend.set_backend(backend=backend_name)
+    size: Dict[str, Any] = {
+        "num_simulation": num_simulation,
+        "num_alternative": num_alternative,
+        "num_covariate": num_covariate,
+        "individual_covariate": individual_covariate
+    }
+    np.random.seed(seed)
+    equilibrium = make_equilibrium(**size)
+
+    def simulate_cold() -> Equilibrium:
+        equilibrium.clear_cache()
+        return simulate_choice(seed=seed, equilibrium=equilibrium)
+
+    # Call of each stage, and whether its work grows with num_simulation
+    stage: Dict[str, Tuple[Callable[[], Any], bool]] = {
+        "make_equilibrium": (lambda: make_equilibrium(**size), True),
+        "compute_utility": (
+            lambda: compute_utility(
+                covariate=equilibrium.covariate,
+                beta=equilibrium.beta
+            ),
+            individual_covariate
+        ),
+        "compute_choice_probability": (
+            lambda: compute_choice_probability(
+                covariate=equilibrium.covariate,
+                beta=equilibrium.beta
+            ),
+            individual_covariate
+        ),
+        "simulate_choice": (simulate_cold, True),
+        "simulate_choice_cached": (
+            lambda: simulate_choice(seed=seed, equilibrium=equilibrium),
+            True
+        )
+    }
+
+    record = []
+    for function, (call, scale) in stage.items():
+        timing = _time_call(call=call, num_repeat=num_repeat)
+        record.append({
+            "function": function,
+            **size,
+            "backend": backend.get_backend(),
+            "numba": (
+                _get_numba_version() if backend.get_backend() == "numba" else None
+            ),
+            **timing,
+            "throughput": (
+                num_simulation / timing["wall_time"]
+                if scale and timing["wall_time"] > 0
+                else None
+            ),
+            **_get_peak_rss(call=call)
+        })
+
+    return record
+
+
+def _time_call(
+    call: Callable[[], Any],
+    num_repeat: int
+) -> Dict[str, float]:
+    """
+    Time a call over several runs.
+
+    Args:
+        call: Function without arguments
+        num_repeat: Number of runs
+
+    Returns:
+        Dictionary with the median wall_time, min_wall_time and
+        max_wall_time in seconds
+    """
+    wall_time = []
+    for _ in range(num_repeat):
+        start = time.perf_counter()
+        call()
+        wall_time.append(time.perf_counter() - start)
+
+    timing = {
+        "wall_time": statistics.median(wall_time),
+        "min_wall_time": min(wall_time),
+        "max_wall_time": max(wall_time)
+    }
+
+    return timing
+
+
+def _get_peak_rss(
+    call: Callable[[], Any]
+) -> Dict[str, Optional[int]]:
+    """
+    Measure the peak resident set size during one call.
+
+    The process's peak is reset to its current resident set size before
+    the call, so the result covers the call's temporaries and result,
+    whichever allocator they come from. Freed heap memory is first handed
+    back to the system where glibc allows it. Otherwise small allocations
+    would reuse pages that are already resident and not show up.
+
+    Args:
+        call: Function without arguments
+
+    Returns:
+        Dictionary with peak_rss, the highest resident set size in bytes
+        during the call, and peak_nbytes, its rise over the resident set
+        size before the call. Both are None where the peak cannot be reset.
+    """
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    try:
+        with open(CLEAR_REFS_PATH, "w") as f:
+            f.write("5")
+    except OSError:
+        return {"peak_rss": None, "peak_nbytes": None}
+    rss = _read_status_nbytes(name="VmRSS")
+    call()
+    peak_rss = _read_status_nbytes(name="VmHWM")
+
+    memory: Dict[str, Optional[int]] = {
+        "peak_rss": peak_rss,
+        "peak_nbytes": max(peak_rss - rss, 0)
+    }
+
+    return memory
+
+
+def _read_status_nbytes(
+    name: str
+) -> int:
+    """
+    Read a memory field of the current process from /proc.
+
+    Args:
+        name: Field of STATUS_PATH, such as VmRSS or VmHWM
+
+    Returns:
+        Value of the field in bytes
+    """
+    with open(STATUS_PATH) as f:
+        for line in f:
+            if line.startswith(f"{name}:"):
+                # Values are given in kB
+                return int(line.split()[1]) * 1024
+    raise KeyError(f"{name} not found in {STATUS_PATH}")
+
+
+def _get_numba_version() -> Optional[str]:
+    """
+    Get the installed Numba version without importing Numba.
+
+    Returns:
+        Version string, or None if Numba is not installed
+    """
+    try:
+        return importlib.metadata.version("numba")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def _get_key(
+    record: Dict[str, Any]
+) -> Tuple[Any, ...]:
+    """
+    Identify a benchmark record by function, problem size and backend.
+
+    Records saved before the backend was recorded match no new record,
+    since it is unknown which backend produced them.
+
+    Args:
+        record: Benchmark record
+
+    Returns:
+        Tuple of function name, num_simulation, num_alternative,
+        num_covariate, individual_covariate, backend and numba version
+    """
+    return (
+        record["function"],
+        record["num_simulation"],
+        record["num_alternative"],
+        record["num_covariate"],
+        record.get("individual_covariate", False),
+        record.get("backend"),
+        record.get("numba")
+    )
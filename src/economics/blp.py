@@ -0,0 +1,159 @@
+import numpy as np
+from typing import Any, Dict, Optional
+
+from .fixed_point import solve_fixed_point
+from .instrument import instrument
+from .mixed_logit import compute_beta_draw, make_normal_draw
+from .simulate import compute_log_softmax, compute_utility
+
+
+@instrument()
+def invert_share(
+    share: np.ndarray,
+    covariate: Optional[np.ndarray] = None,
+    beta_covariance: Optional[np.ndarray] = None,
+    mean_utility_initial: Optional[np.ndarray] = None,
+    num_draw: int = 200,
+    seed: int = 0,
+    tolerance: float = 1e-12,
+    max_iteration: int = 1000,
+    acceleration: str = "squarem"
+) -> Dict[str, Any]:
+    """
+    Invert observed market shares into mean utilities (BLP contraction).
+
+    Utility of product j for consumer i is delta_j + x_j' L z_i, with
+    L L' = beta_covariance, z_i standard normal, and an outside good of
+    utility zero. The mean utilities delta solve, in log space,
+
+        delta <- delta + log(share) - log(predicted share(delta)),
+
+    which is a contraction (Berry, Levinsohn and Pakes 1995). Consumer
+    deviations x_j' L z_i are computed once, over the cached scrambled
+    Halton draws of economics.mixed_logit. Predicted log shares are then a
+    log-mean-exp of log-softmax probabilities, which stays finite for tiny
+    shares. All markets are solved together by solve_fixed_point with
+    SQUAREM acceleration. Each market stops once converged.
+
+    In an outer GMM loop, pass the previous solution as
+    mean_utility_initial. Nearby parameters then take only a few
+    iterations. Without random coefficients the inversion is the closed
+    form log(share_j) - log(share_0).
+
+    Args:
+        share: Observed inside-good shares of shape (num_market,
+            num_alternative). Rows must be positive and sum to less than one.
+        covariate: Covariates with random coefficients, shared
+            (num_alternative, num_covariate) or by market (num_market,
+            num_alternative, num_covariate), or None for the plain logit
+        beta_covariance: Covariance matrix of the random coefficients, or
+            None for the plain logit
+        mean_utility_initial: Starting mean utilities, such as the solution
+            from the previous outer-loop iteration. If None, the plain logit
+            inversion.
+        num_draw: Number of quasi-random consumer draws
+        seed: Seed of the Halton scrambling
+        tolerance: Convergence threshold on the sup norm of delta changes
+        max_iteration: Maximum number of SQUAREM cycles
+        acceleration: "squarem" or "none", as for solve_fixed_point
+
+    Returns:
+        Dictionary with mean_utility of shape (num_market, num_alternative),
+        and per-market converged, num_iteration, num_evaluation and residual
+    """
+    share = np.asarray(share, dtype=np.float64)
+    log_share = np.log(share)
+    log_outside_share = np.log1p(-share.sum(axis=-1, keepdims=True))
+    num_market = share.shape[0]
+
+    if covariate is None or beta_covariance is None:
+        mean_utility = log_share - log_outside_share
+        return {
+            "mean_utility": mean_utility,
+            "converged": np.ones(num_market, dtype=bool),
+            "num_iteration": np.zeros(num_market, dtype=np.int64),
+            "num_evaluation": np.zeros(num_market, dtype=np.int64),
+            "residual": np.zeros(num_market)
+        }
+
+    # Consumer deviations from the mean utility, with draws on the last axis
+    beta_draw = compute_beta_draw(
+        beta=np.zeros((covariate.shape[-1], 1)),
+        beta_covariance=beta_covariance,
+        normal_draw=make_normal_draw(
+            num_draw=num_draw,
+            num_dimension=covariate.shape[-1],
+            seed=seed
+        )
+    )
+    deviation = np.broadcast_to(
+        compute_utility(covariate=covariate, beta=beta_draw.T),
+        share.shape + (num_draw,)
+    )
+
+    def update_mean_utility(
+        mean_utility: np.ndarray,
+        market: np.ndarray
+    ) -> np.ndarray:
+        updated_mean_utility: np.ndarray = (
+            mean_utility
+            + log_share[market]
+            - compute_log_share(
+                mean_utility=mean_utility,
+                deviation=deviation[market]
+            )
+        )
+        return updated_mean_utility
+
+    solution = solve_fixed_point(
+        function=update_mean_utility,
+        initial=(
+            log_share - log_outside_share
+            if mean_utility_initial is None
+            else mean_utility_initial
+        ),
+        tolerance=tolerance,
+        max_iteration=max_iteration,
+        acceleration=acceleration
+    )
+
+    inversion = {
+        "mean_utility": solution["value"],
+        "converged": solution["converged"],
+        "num_iteration": solution["num_iteration"],
+        "num_evaluation": solution["num_evaluation"],
+        "residual": solution["residual"]
+    }
+
+    return inversion
+
+
+def compute_log_share(
+    mean_utility: np.ndarray,
+    deviation: np.ndarray
+) -> np.ndarray:
+    """
+    Compute log market shares of random-coefficients logit demand.
+
+    Args:
+        mean_utility: Mean utilities of shape (num_market, num_alternative)
+        deviation: Consumer deviations from the mean utility, of shape
+            (num_market, num_alternative, num_draw)
+
+    Returns:
+        Log inside-good shares of shape (num_market, num_alternative),
+        averaged over draws with an outside good of utility zero
+    """
+    num_market, num_alternative, num_draw = deviation.shape
+    utility = np.empty((num_market, num_alternative + 1, num_draw))
+    np.add(mean_utility[..., np.newaxis], deviation, out=utility[:, :-1])
+    utility[:, -1] = 0
+
+    log_choice_probability = compute_log_softmax(utility=utility)[:, :-1]
+    max_log_probability = log_choice_probability.max(axis=-1, keepdims=True)
+    log_share: np.ndarray = (
+        max_log_probability[..., 0]
+        + np.log(np.mean(np.exp(log_choice_probability - max_log_probability), axis=-1))
+    )
+
+    return log_share
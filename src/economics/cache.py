@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from . import backend
+from .simulate import Equilibrium, simulate_parameter
+from .storage import load_equilibrium, save_equilibrium
+
+# Default cache directory and size bound
+CACHE_PATH = "output/cache"
+MAX_CACHE_NBYTES = 10 * 2**30
+
+
+def load_or_simulate(
+    parameter: Dict[str, Any],
+    cache_path: str = CACHE_PATH,
+    max_nbytes: int = MAX_CACHE_NBYTES
+) -> Equilibrium:
+    """
+    Return a simulated equilibrium from the cache, simulating it on a miss.
+
+    Entries are keyed by get_cache_key, so any change to the parameters,
+    the seeds, the economics source code, the backend or the NumPy version
+    gives a new entry. A hit returns arrays memory-mapped read-only from
+    the cache. A miss runs simulate_parameter, and its result is written
+    under a temporary name and renamed into place. Concurrent runs
+    therefore never see a partial entry. The cache is then trimmed to
+    max_nbytes by evicting least recently used entries. An entry that
+    another process evicts while it is being opened counts as a miss.
+
+    Args:
+        parameter: JSON-serializable parameters of simulate_parameter
+        cache_path: Cache directory, created if missing
+        max_nbytes: Maximum total bytes of cache entries
+
+    Returns:
+        Equilibrium with memory-mapped arrays, or with in-memory arrays if
+        the new entry was evicted before it could be opened
+    """
+    key = get_cache_key(parameter=parameter)
+    entry_path = os.path.join(cache_path, key)
+
+    if os.path.isdir(entry_path):
+        try:
+            return _load_entry(entry_path=entry_path)
+        except FileNotFoundError:
+            # Evicted since the check; drop what is left and simulate again
+            shutil.rmtree(entry_path, ignore_errors=True)
+
+    equilibrium = simulate_parameter(parameter=parameter)
+    os.makedirs(cache_path, exist_ok=True)
+    temporary_path = os.path.join(cache_path, f".{key}.{os.getpid()}")
+    save_equilibrium(
+        equilibrium=equilibrium,
+        path=temporary_path,
+        config=parameter
+    )
+    try:
+        os.rename(temporary_path, entry_path)
+    except OSError:
+        # Another process stored the same entry first
+        shutil.rmtree(temporary_path, ignore_errors=True)
+    evict_cache(cache_path=cache_path, max_nbytes=max_nbytes, keep=key)
+
+    try:
+        return _load_entry(entry_path=entry_path)
+    except FileNotFoundError:
+        # Another process evicted the new entry at once
+        return equilibrium
+
+
+def get_cache_key(
+    parameter: Dict[str, Any]
+) -> str:
+    """
+    Hash parameters, code version and backend into a cache key.
+
+    Args:
+        parameter: JSON-serializable parameters, including seeds
+
+    Returns:
+        Hexadecimal SHA-256 digest
+    """
+    content = json.dumps(
+        {
+            "parameter": parameter,
+            "source_version": get_source_version(),
+            "backend": backend.get_backend(),
+            "numpy_version": np.__version__
+        },
+        sort_keys=True
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def get_source_version() -> str:
+    """
+    Hash the source files of the economics package.
+
+    Returns:
+        Hexadecimal SHA-256 digest of the package's .py files and their
+        relative paths
+    """
+    package_path = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for root, directory, file in os.walk(package_path):
+        directory.sort()
+        for name in sorted(file):
+            if not name.endswith(".py"):
+                continue
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, package_path).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def evict_cache(
+    cache_path: str = CACHE_PATH,
+    max_nbytes: int = MAX_CACHE_NBYTES,
+    keep: Optional[str] = None
+) -> List[str]:
+    """
+    Delete least recently used cache entries until the cache fits.
+
+    Recency is the modification time of an entry's directory, which
+    load_or_simulate updates on every hit. Arrays that are already
+    memory-mapped stay readable after their entry is deleted.
+
+    Args:
+        cache_path: Cache directory
+        max_nbytes: Maximum total bytes of cache entries
+        keep: Key of an entry never to evict, such as the one just stored
+
+    Returns:
+        Keys of the evicted entries
+    """
+    if not os.path.isdir(cache_path):
+        return []
+
+    entry: List[Dict[str, Any]] = []
+    for key in os.listdir(cache_path):
+        entry_path = os.path.join(cache_path, key)
+        if key.startswith(".") or not os.path.isdir(entry_path):
+            continue
+        entry.append({
+            "key": key,
+            "path": entry_path,
+            "nbytes": _get_directory_nbytes(path=entry_path),
+            "access_time": os.path.getmtime(entry_path)
+        })
+
+    total_nbytes = sum(item["nbytes"] for item in entry)
+    evicted: List[str] = []
+    for item in sorted(entry, key=lambda item: item["access_time"]):
+        if total_nbytes <= max_nbytes:
+            break
+        if item["key"] == keep:
+            continue
+        shutil.rmtree(item["path"], ignore_errors=True)
+        total_nbytes -= item["nbytes"]
+        evicted.append(item["key"])
+
+    return evicted
+
+
+def _load_entry(
+    entry_path: str
+) -> Equilibrium:
+    """
+    Mark a cache entry as recently used and memory-map its arrays.
+
+    Args:
+        entry_path: Directory of the entry
+
+    Returns:
+        Equilibrium with memory-mapped arrays
+
+    Raises:
+        FileNotFoundError: If the entry, or one of its files, was deleted
+    """
+    os.utime(entry_path)
+    return load_equilibrium(path=entry_path, mmap_mode="r")
+
+
+def _get_directory_nbytes(
+    path: str
+) -> int:
+    """
+    Get the total size of the files in a directory.
+
+    Args:
+        path: Directory
+
+    Returns:
+        Total bytes of the files directly in path
+    """
+    return sum(
+        entry.stat().st_size
+        for entry in os.scandir(path)
+        if entry.is_file()
+    )
@@ -0,0 +1,64 @@
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+
+def main(
+    argument: Optional[List[str]] = None,
+    prog: str = "python -m economics.cli"
+) -> int:
+    """
+    Run a parameter grid from a JSON config on the command line.
+
+    Usage: python -m economics.cli config.json [--num-worker N]
+    [--output-path DIR]. See economics.simulate.run_grid for the config
+    format. NumPy and the simulation modules are imported only after the
+    arguments are parsed, so --help and usage errors return at once.
+    python -m economics.simulate runs the same command. It loads NumPy and
+    the simulation module before parsing, so it starts slower.
+
+    Args:
+        argument: Command-line arguments, sys.argv[1:] if None
+        prog: Command shown in usage and help messages
+
+    Returns:
+        Exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Simulate logit choices at every point of a parameter grid."
+    )
+    parser.add_argument(
+        "config",
+        help="JSON file with parameter, grid and optionally output_path"
+    )
+    parser.add_argument(
+        "--num-worker",
+        type=int,
+        default=1,
+        help="number of worker processes; 0 uses all CPUs (default: 1)"
+    )
+    parser.add_argument(
+        "--output-path",
+        help="directory for saved grid points, overriding the config"
+    )
+    parsed = parser.parse_args(argument)
+
+    with open(parsed.config) as f:
+        config = json.load(f)
+    if parsed.output_path is not None:
+        config["output_path"] = parsed.output_path
+
+    # Imported as economics.simulate, never as __main__, so that worker
+    # processes unpickle the same functions and classes
+    from .simulate import run_grid
+
+    for result in run_grid(config=config, num_worker=parsed.num_worker or None):
+        print(json.dumps(result))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
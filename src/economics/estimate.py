@@ -0,0 +1,302 @@
+import numpy as np
+from typing import Any, Dict, Optional
+
+from . import backend
+from .instrument import instrument
+from .simulate import (
+    MEMORY_BUDGET,
+    Equilibrium,
+    _get_chunk_size,
+    compute_log_choice_probability,
+)
+
+
+@instrument()
+def estimate_beta(
+    equilibrium: Equilibrium,
+    beta_initial: Optional[np.ndarray] = None,
+    tolerance: float = 1e-10,
+    max_iteration: int = 100,
+    aggregate_pattern: bool = False,
+    memory_budget: int = MEMORY_BUDGET
+) -> Dict[str, Any]:
+    """
+    Estimate beta of the multinomial logit by maximum likelihood.
+
+    The simulated choices are first reduced to choice counts per covariate
+    pattern (see compute_sufficient_statistic). The log-likelihood, its
+    gradient and its Hessian are then evaluated on the counts, so each
+    Newton step costs O(patterns) rather than O(simulations). Newton steps
+    are halved until the log-likelihood does not decrease, which keeps the
+    iteration inside a region where the quadratic model is trusted.
+    Standard errors come from the inverse of the negative Hessian at the
+    estimate. If that Hessian has rank below num_covariate, beta is not
+    identified, for example with shared covariates and num_covariate of
+    num_alternative or more. The standard errors are then NaN and
+    converged is False.
+
+    Args:
+        equilibrium: Equilibrium containing covariate and simulated choice
+        beta_initial: Starting value of beta, zeros if None
+        tolerance: Convergence threshold on the Newton decrement
+        max_iteration: Maximum number of Newton iterations
+        aggregate_pattern: Whether to merge individuals with identical
+            covariates when covariates vary by individual. This pays off
+            only for discrete covariates; with continuous ones no rows
+            merge and the sort takes longer than the likelihood.
+        memory_budget: Maximum bytes of temporaries per chunk of patterns
+
+    Returns:
+        Dictionary with beta, standard_error, log_likelihood, gradient,
+        hessian, num_iteration, identified and converged
+    """
+    statistic = compute_sufficient_statistic(
+        covariate=equilibrium.covariate,
+        choice=equilibrium.choice,
+        aggregate_pattern=aggregate_pattern
+    )
+    num_covariate = statistic["covariate"].shape[2]
+
+    beta = (
+        np.zeros((num_covariate, 1))
+        if beta_initial is None
+        else np.array(beta_initial, dtype=np.float64).reshape(-1, 1)
+    )
+    likelihood = compute_log_likelihood(
+        beta=beta,
+        statistic=statistic,
+        memory_budget=memory_budget
+    )
+
+    converged = False
+    num_iteration = 0
+    while num_iteration < max_iteration:
+        direction = _solve_newton_direction(
+            hessian=likelihood["hessian"],
+            gradient=likelihood["gradient"]
+        )
+        decrement = float(likelihood["gradient"].ravel() @ direction.ravel())
+        if decrement <= tolerance:
+            converged = True
+            break
+        num_iteration += 1
+
+        # Halve the step until the log-likelihood does not decrease
+        step = 1.0
+        while True:
+            beta_candidate = beta + step * direction
+            likelihood_candidate = compute_log_likelihood(
+                beta=beta_candidate,
+                statistic=statistic,
+                memory_budget=memory_budget
+            )
+            if (
+                likelihood_candidate["log_likelihood"]
+                >= likelihood["log_likelihood"]
+                or step < 1e-10
+            ):
+                break
+            step /= 2
+        beta = beta_candidate
+        likelihood = likelihood_candidate
+
+    # A rank-deficient Hessian leaves beta unidentified; its pseudo-inverse
+    # would report finite standard errors for arbitrary estimates
+    identified = bool(
+        np.linalg.matrix_rank(-likelihood["hessian"]) == num_covariate
+    )
+    if identified:
+        covariance = np.linalg.inv(-likelihood["hessian"])
+        standard_error = np.sqrt(np.diag(covariance)).reshape(-1, 1)
+    else:
+        standard_error = np.full((num_covariate, 1), np.nan)
+        converged = False
+
+    result = {
+        "beta": beta,
+        "standard_error": standard_error,
+        "log_likelihood": likelihood["log_likelihood"],
+        "gradient": likelihood["gradient"],
+        "hessian": likelihood["hessian"],
+        "num_iteration": num_iteration,
+        "identified": identified,
+        "converged": converged
+    }
+
+    return result
+
+
+@instrument()
+def compute_sufficient_statistic(
+    covariate: np.ndarray,
+    choice: np.ndarray,
+    aggregate_pattern: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    Reduce simulated choices to choice counts per covariate pattern.
+
+    With shared covariates there is a single pattern and the statistic is
+    the number of times each alternative was chosen. With individual
+    covariates each individual is a pattern, and identical patterns are
+    merged when aggregate_pattern is set. Choices of -1 (not simulated)
+    are ignored.
+
+    Args:
+        covariate: Matrix of covariates, or tensor of covariates by individual
+        choice: Vector of chosen alternative indices
+        aggregate_pattern: Whether to merge identical individual covariates.
+            Sorting the rows costs more than it saves unless covariates
+            take few distinct values.
+
+    Returns:
+        Dictionary with covariate of shape (num_pattern, num_alternative,
+        num_covariate) and count of shape (num_pattern, num_alternative)
+    """
+    choice = np.asarray(choice)
+    num_alternative = covariate.shape[-2]
+
+    if covariate.ndim == 2:
+        count = np.bincount(choice[choice >= 0], minlength=num_alternative)
+        return {
+            "covariate": covariate[np.newaxis],
+            "count": count[np.newaxis].astype(np.float64)
+        }
+
+    chosen = np.flatnonzero(choice >= 0)
+    if aggregate_pattern:
+        # Compare each individual's covariates as one opaque byte string
+        row = np.ascontiguousarray(covariate[chosen]).reshape(chosen.shape[0], -1)
+        row_key = row.view(np.dtype((np.void, row.dtype.itemsize * row.shape[1])))
+        _, first, pattern = np.unique(
+            row_key.ravel(),
+            return_index=True,
+            return_inverse=True
+        )
+        pattern_covariate = covariate[chosen[first]]
+    else:
+        pattern = np.arange(chosen.shape[0])
+        pattern_covariate = covariate[chosen]
+
+    num_pattern = pattern_covariate.shape[0]
+    count = np.bincount(
+        pattern * num_alternative + choice[chosen],
+        minlength=num_pattern * num_alternative
+    ).reshape(num_pattern, num_alternative)
+
+    return {
+        "covariate": pattern_covariate,
+        "count": count.astype(np.float64)
+    }
+
+
+@instrument()
+def compute_log_likelihood(
+    beta: np.ndarray,
+    statistic: Dict[str, np.ndarray],
+    memory_budget: int = MEMORY_BUDGET
+) -> Dict[str, Any]:
+    """
+    Compute the logit log-likelihood with its analytic gradient and Hessian.
+
+    For pattern p with covariates X_p, choice counts n_p, total count N_p
+    and choice probabilities s_p:
+
+        log-likelihood = sum_p n_p' log s_p
+        gradient = sum_p X_p' (n_p - N_p s_p)
+        Hessian = -sum_p N_p X_p' (diag(s_p) - s_p s_p') X_p
+
+    Patterns are processed in chunks that fit within memory_budget, or in
+    a single fused pass with the numba backend.
+
+    Args:
+        beta: Vector of coefficients
+        statistic: Sufficient statistic from compute_sufficient_statistic
+        memory_budget: Maximum bytes of temporaries per chunk of patterns
+
+    Returns:
+        Dictionary with log_likelihood, gradient of shape (num_covariate, 1)
+        and hessian of shape (num_covariate, num_covariate)
+    """
+    covariate = statistic["covariate"]
+    count = statistic["count"]
+    num_pattern, num_alternative, num_covariate = covariate.shape
+
+    if backend.get_backend() == "numba":
+        log_likelihood, gradient, hessian = backend.compute_log_likelihood(
+            covariate=covariate,
+            count=count,
+            beta=beta
+        )
+        return {
+            "log_likelihood": float(log_likelihood),
+            "gradient": gradient.reshape(-1, 1),
+            "hessian": hessian
+        }
+
+    log_likelihood = 0.0
+    gradient = np.zeros(num_covariate)
+    hessian = np.zeros((num_covariate, num_covariate))
+
+    # Weighted covariates dominate the temporaries
+    chunk_size = _get_chunk_size(
+        row_nbytes=2 * num_alternative * num_covariate * covariate.itemsize,
+        memory_budget=memory_budget
+    )
+    for start in range(0, num_pattern, chunk_size):
+        stop = min(start + chunk_size, num_pattern)
+        covariate_chunk = covariate[start:stop]
+        count_chunk = count[start:stop]
+        total_count = count_chunk.sum(axis=1)
+
+        log_choice_probability = compute_log_choice_probability(
+            covariate=covariate_chunk,
+            beta=beta
+        )[..., 0]
+        choice_probability = np.exp(log_choice_probability)
+
+        # Zero counts contribute nothing, even where log probability is -inf
+        log_likelihood += np.sum(
+            count_chunk[count_chunk > 0] * log_choice_probability[count_chunk > 0]
+        )
+
+        # Expected covariates under the model, one row per pattern
+        mean_covariate = np.einsum("pj,pjk->pk", choice_probability, covariate_chunk)
+        gradient += np.einsum("pj,pjk->k", count_chunk, covariate_chunk)
+        gradient -= total_count @ mean_covariate
+
+        weight = total_count[:, np.newaxis] * choice_probability
+        weighted_covariate = covariate_chunk * weight[..., np.newaxis]
+        hessian -= (
+            weighted_covariate.reshape(-1, num_covariate).T
+            @ covariate_chunk.reshape(-1, num_covariate)
+        )
+        hessian += (mean_covariate * total_count[:, np.newaxis]).T @ mean_covariate
+
+    likelihood = {
+        "log_likelihood": float(log_likelihood),
+        "gradient": gradient.reshape(-1, 1),
+        "hessian": hessian
+    }
+
+    return likelihood
+
+
+def _solve_newton_direction(
+    hessian: np.ndarray,
+    gradient: np.ndarray
+) -> np.ndarray:
+    """
+    Solve for the Newton ascent direction -H^{-1} g.
+
+    Args:
+        hessian: Hessian of the log-likelihood
+        gradient: Gradient of the log-likelihood
+
+    Returns:
+        Newton direction, via least squares if the Hessian is singular
+    """
+    try:
+        direction: np.ndarray = np.linalg.solve(-hessian, gradient)
+    except np.linalg.LinAlgError:
+        direction = np.linalg.lstsq(-hessian, gradient, rcond=None)[0]
+    return direction
@@ -0,0 +1,124 @@
+import numpy as np
+from typing import Any, Callable, Dict
+
+ACCELERATION = ("squarem", "none")
+
+
+def solve_fixed_point(
+    function: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    initial: np.ndarray,
+    tolerance: float = 1e-12,
+    max_iteration: int = 1000,
+    acceleration: str = "squarem"
+) -> Dict[str, Any]:
+    """
+    Solve a batch of independent fixed-point problems x = f(x).
+
+    The first axis of initial indexes markets, which are solved together
+    but converge separately. Every iteration evaluates function once on all
+    markets that are still active, so the work stays vectorized, and a
+    market is frozen as soon as its sup-norm step falls below tolerance.
+
+    With acceleration="squarem", each iteration is one SQUAREM cycle
+    (Varadhan and Roland 2008, scheme S3). From x0 it takes two plain steps
+    x1 = f(x0) and x2 = f(x1), then extrapolates to x0 - 2 a r + a^2 v with
+    r = x1 - x0, v = x2 - 2 x1 + x0 and a = -max(1, |r| / |v|) per market,
+    followed by one stabilizing step. Extrapolations that leave the finite
+    range fall back to x2.
+
+    Args:
+        function: Map f(value, market) returning the image of value, where
+            value holds the rows of initial for the market indices in market
+        initial: Starting values with markets on the first axis
+        tolerance: Convergence threshold on the sup norm of f(x) - x
+        max_iteration: Maximum number of iterations (cycles with SQUAREM)
+        acceleration: "squarem" or "none" for plain iteration
+
+    Returns:
+        Dictionary with value (the fixed points), residual (last sup-norm
+        step), converged, num_iteration and num_evaluation, each per market
+    """
+    if acceleration not in ACCELERATION:
+        raise ValueError(
+            f"acceleration must be one of {ACCELERATION}, got {acceleration!r}"
+        )
+    value = np.array(initial, dtype=np.float64)
+    num_market = value.shape[0]
+    residual = np.full(num_market, np.inf)
+    converged = np.zeros(num_market, dtype=bool)
+    num_iteration = np.zeros(num_market, dtype=np.int64)
+    num_evaluation = np.zeros(num_market, dtype=np.int64)
+
+    active = np.arange(num_market)
+    for _ in range(max_iteration):
+        if active.size == 0:
+            break
+        value_0 = value[active]
+        value_1 = function(value_0, active)
+        step = value_1 - value_0
+        num_iteration[active] += 1
+        num_evaluation[active] += 1
+
+        # Freeze the markets whose plain step is already small enough
+        residual[active] = _get_norm(array=step, order=np.inf)
+        done = residual[active] <= tolerance
+        value[active[done]] = value_1[done]
+        converged[active[done]] = True
+        keep = ~done
+        active = active[keep]
+        if active.size == 0:
+            break
+        value_0, value_1, step = value_0[keep], value_1[keep], step[keep]
+
+        if acceleration == "none":
+            value[active] = value_1
+            continue
+
+        value_2 = function(value_1, active)
+        curvature = value_2 - 2 * value_1 + value_0
+        step_length = -np.maximum(
+            1.0,
+            _get_norm(array=step, order=2)
+            / np.maximum(_get_norm(array=curvature, order=2), np.finfo(float).tiny)
+        )
+        step_length = step_length.reshape((-1,) + (1,) * (value_0.ndim - 1))
+        extrapolated = (
+            value_0
+            - 2 * step_length * step
+            + step_length**2 * curvature
+        )
+        extrapolated = function(extrapolated, active)
+        value[active] = np.where(np.isfinite(extrapolated), extrapolated, value_2)
+        num_evaluation[active] += 2
+
+    result = {
+        "value": value,
+        "residual": residual,
+        "converged": converged,
+        "num_iteration": num_iteration,
+        "num_evaluation": num_evaluation
+    }
+
+    return result
+
+
+def _get_norm(
+    array: np.ndarray,
+    order: float
+) -> np.ndarray:
+    """
+    Compute the norm of each market's block of an array.
+
+    Args:
+        array: Array with markets on the first axis
+        order: np.inf for the sup norm, 2 for the Euclidean norm
+
+    Returns:
+        Vector of norms, one per market
+    """
+    norm: np.ndarray = np.linalg.norm(
+        array.reshape(array.shape[0], -1),
+        ord=order,
+        axis=1
+    )
+    return norm
@@ -0,0 +1,315 @@
+import atexit
+import functools
+import json
+import os
+import time
+import tracemalloc
+import numpy as np
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, ParamSpec, TypeVar
+
+# Environment variable naming a JSON file to trace the whole process into
+TRACE_ENVIRONMENT = "ECONOMICS_TRACE"
+
+# Parameters and result of an instrumented function
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class Trace:
+    """
+    Per-stage timings and memory of one instrumented run.
+
+    Stages are aggregated by name. For each stage the trace keeps the call
+    count, total and maximum wall time, total bytes of array arguments and
+    results, and the peak number of bytes allocated during a call. Only the
+    process that started the trace records into it, so forked workers do
+    not write into a copy that is then lost.
+    """
+
+    def __init__(
+        self,
+        trace_memory: bool = True
+    ) -> None:
+        self.trace_memory = trace_memory
+        self.stage: Dict[str, Dict[str, Any]] = {}
+        self.pid = os.getpid()
+        self.start = time.perf_counter()
+        self.wall_time: Optional[float] = None
+        self._started_tracemalloc = False
+        # Peak allocation seen by each open stage, innermost last
+        self._peak_stack: List[int] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the trace to a JSON-serializable dictionary.
+
+        Returns:
+            Dictionary with pid, total wall_time and per-stage statistics
+        """
+        wall_time = self.wall_time
+        if wall_time is None:
+            wall_time = time.perf_counter() - self.start
+        return {
+            "pid": self.pid,
+            "wall_time": wall_time,
+            "stage": self.stage
+        }
+
+
+# Active trace, or None when instrumentation is disabled
+_trace: Optional[Trace] = None
+
+
+@contextmanager
+def trace(
+    path: Optional[str] = None,
+    trace_memory: bool = True
+) -> Iterator[Trace]:
+    """
+    Enable instrumentation for the duration of a with block.
+
+    Allocated bytes are measured with tracemalloc, which NumPy reports its
+    array buffers to. That slows down allocation-heavy code, so it can be
+    switched off with trace_memory=False when only timings are needed.
+
+    Args:
+        path: JSON file the trace is written to on exit, or None
+        trace_memory: Whether to measure allocated bytes
+
+    Yields:
+        Trace being recorded
+    """
+    global _trace
+    previous = _trace
+    _trace = _start_trace(trace_memory=trace_memory)
+    try:
+        yield _trace
+    finally:
+        _stop_trace(trace=_trace, path=path)
+        _trace = previous
+
+
+@contextmanager
+def stage(
+    name: str,
+    **array: np.ndarray
+) -> Iterator[None]:
+    """
+    Record a block of code as a stage of the active trace.
+
+    Does nothing when instrumentation is disabled.
+
+    Args:
+        name: Stage name
+        **array: Arrays whose sizes are recorded with the stage
+    """
+    trace = _trace
+    if trace is None or trace.pid != os.getpid():
+        yield
+        return
+    record = _enter_stage(trace=trace)
+    try:
+        yield
+    finally:
+        _exit_stage(
+            trace=trace,
+            name=name,
+            record=record,
+            input_nbytes=_get_nbytes(value=tuple(array.values())),
+            output_nbytes=0
+        )
+
+
+def instrument(
+    name: Optional[str] = None
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """
+    Decorate a function so that each call is recorded as a stage.
+
+    When instrumentation is disabled the wrapper only checks one global and
+    calls the function, so decorated hot paths keep their speed.
+
+    Args:
+        name: Stage name, the function name if None
+
+    Returns:
+        Decorator
+    """
+    def decorator(function: Callable[P, R]) -> Callable[P, R]:
+        stage_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            trace = _trace
+            if trace is None or trace.pid != os.getpid():
+                return function(*args, **kwargs)
+            record = _enter_stage(trace=trace)
+            output_nbytes = 0
+            try:
+                result = function(*args, **kwargs)
+                output_nbytes = _get_nbytes(value=result)
+                return result
+            finally:
+                _exit_stage(
+                    trace=trace,
+                    name=stage_name,
+                    record=record,
+                    input_nbytes=_get_nbytes(value=(args, kwargs)),
+                    output_nbytes=output_nbytes
+                )
+
+        return wrapper
+
+    return decorator
+
+
+def _start_trace(
+    trace_memory: bool
+) -> Trace:
+    """
+    Create a trace and start tracemalloc if memory is traced.
+
+    Args:
+        trace_memory: Whether to measure allocated bytes
+
+    Returns:
+        New trace
+    """
+    new_trace = Trace(trace_memory=trace_memory)
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        new_trace._started_tracemalloc = True
+    return new_trace
+
+
+def _stop_trace(
+    trace: Trace,
+    path: Optional[str]
+) -> None:
+    """
+    Finish a trace, stop tracemalloc if it started it, and write it out.
+
+    Args:
+        trace: Trace to finish
+        path: JSON file to write the trace to, or None
+    """
+    trace.wall_time = time.perf_counter() - trace.start
+    if trace._started_tracemalloc:
+        tracemalloc.stop()
+    if path is not None and trace.pid == os.getpid():
+        with open(path, "w") as f:
+            json.dump(trace.to_dict(), f, indent=2)
+
+
+def _enter_stage(
+    trace: Trace
+) -> Dict[str, Any]:
+    """
+    Start measuring a stage.
+
+    tracemalloc keeps a single peak, so the peak of the enclosing stage is
+    saved before it is reset and merged back when this stage exits.
+
+    Args:
+        trace: Active trace
+
+    Returns:
+        Start time and traced memory of the stage
+    """
+    record = {"start": time.perf_counter(), "memory": 0}
+    if trace.trace_memory and tracemalloc.is_tracing():
+        memory, peak = tracemalloc.get_traced_memory()
+        if trace._peak_stack:
+            trace._peak_stack[-1] = max(trace._peak_stack[-1], peak)
+        tracemalloc.reset_peak()
+        trace._peak_stack.append(memory)
+        record["memory"] = memory
+    return record
+
+
+def _exit_stage(
+    trace: Trace,
+    name: str,
+    record: Dict[str, Any],
+    input_nbytes: int,
+    output_nbytes: int
+) -> None:
+    """
+    Finish measuring a stage and add it to the trace.
+
+    Args:
+        trace: Active trace
+        name: Stage name
+        record: Value returned by _enter_stage
+        input_nbytes: Bytes of array arguments
+        output_nbytes: Bytes of array results
+    """
+    wall_time = time.perf_counter() - record["start"]
+
+    allocated_nbytes = 0
+    if trace.trace_memory and tracemalloc.is_tracing() and trace._peak_stack:
+        peak = max(trace._peak_stack.pop(), tracemalloc.get_traced_memory()[1])
+        allocated_nbytes = peak - record["memory"]
+        if trace._peak_stack:
+            trace._peak_stack[-1] = max(trace._peak_stack[-1], peak)
+
+    statistic = trace.stage.setdefault(name, {
+        "call_count": 0,
+        "wall_time": 0.0,
+        "max_wall_time": 0.0,
+        "input_nbytes": 0,
+        "output_nbytes": 0,
+        "peak_allocated_nbytes": 0
+    })
+    statistic["call_count"] += 1
+    statistic["wall_time"] += wall_time
+    statistic["max_wall_time"] = max(statistic["max_wall_time"], wall_time)
+    statistic["input_nbytes"] += input_nbytes
+    statistic["output_nbytes"] += output_nbytes
+    statistic["peak_allocated_nbytes"] = max(
+        statistic["peak_allocated_nbytes"],
+        allocated_nbytes
+    )
+
+
+def _get_nbytes(
+    value: Any
+) -> int:
+    """
+    Count the bytes of the arrays in a value.
+
+    Looks into tuples, lists and dictionaries, and into objects with a
+    to_dict method such as Equilibrium.
+
+    Args:
+        value: Value to inspect
+
+    Returns:
+        Total nbytes of the arrays found
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_get_nbytes(value=item) for item in value)
+    if isinstance(value, dict):
+        return sum(_get_nbytes(value=item) for item in value.values())
+    if hasattr(value, "to_dict"):
+        return _get_nbytes(value=value.to_dict())
+    return 0
+
+
+def _start_environment_trace() -> None:
+    """
+    Trace the whole process if TRACE_ENVIRONMENT names an output file.
+    """
+    global _trace
+    path = os.environ.get(TRACE_ENVIRONMENT)
+    if not path:
+        return
+    _trace = _start_trace(trace_memory=True)
+    environment_trace = _trace
+    atexit.register(_stop_trace, trace=environment_trace, path=path)
+
+
+_start_environment_trace()
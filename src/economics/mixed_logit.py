@@ -0,0 +1,344 @@
+import numpy as np
+from functools import lru_cache
+from typing import List, Optional
+
+from .instrument import instrument
+from .simulate import (
+    MEMORY_BUDGET,
+    Equilibrium,
+    _accumulate_probability,
+    _get_chunk_size,
+    _iterate_stream,
+    _sample_choice,
+    compute_log_softmax,
+    compute_utility,
+)
+
+# Coefficients of Acklam's rational approximation to the normal quantile
+_QUANTILE_A = (
+    -3.969683028665376e01, 2.209460984245205e02, -2.759285104469687e02,
+    1.383577518672690e02, -3.066479806614716e01, 2.506628277459239e00,
+)
+_QUANTILE_B = (
+    -5.447609879822406e01, 1.615858368580409e02, -1.556989798598866e02,
+    6.680131188771972e01, -1.328068155288572e01,
+)
+_QUANTILE_C = (
+    -7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e00,
+    -2.549732539343734e00, 4.374664141464968e00, 2.938163982698783e00,
+)
+_QUANTILE_D = (
+    7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e00,
+    3.754408661907416e00,
+)
+
+
+@instrument()
+def compute_mixed_choice_probability(
+    covariate: np.ndarray,
+    beta: np.ndarray,
+    beta_covariance: np.ndarray,
+    num_draw: int = 200,
+    seed: int = 0,
+    available: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Compute random-coefficients logit choice probabilities.
+
+    Coefficients are beta + L z with L L' = beta_covariance and z standard
+    normal. The integral over z is approximated by averaging logit
+    probabilities over scrambled Halton draws from make_normal_draw. Those
+    draws are cached, so repeated calls reuse them. All draws are evaluated
+    at once as a (num_alternative, num_draw) utility tensor per market.
+
+    Args:
+        covariate: Matrix of covariates, or tensor of covariates by market
+        beta: Vector of mean coefficients
+        beta_covariance: Covariance matrix of the coefficients
+        num_draw: Number of quasi-random draws
+        seed: Seed of the Halton scrambling
+        available: Boolean mask of alternatives in the choice set, as for
+            compute_choice_probability
+
+    Returns:
+        Vector of choice probabilities, or (num_market, num_alternative, 1)
+        tensor
+    """
+    normal_draw = make_normal_draw(
+        num_draw=num_draw,
+        num_dimension=beta.shape[0],
+        seed=seed
+    )
+    beta_draw = compute_beta_draw(
+        beta=beta,
+        beta_covariance=beta_covariance,
+        normal_draw=normal_draw
+    )
+
+    # Utilities with draws along the last axis
+    utility = compute_utility(covariate=covariate, beta=beta_draw.T)
+    choice_probability: np.ndarray = np.exp(
+        compute_log_softmax(utility=utility, available=available)
+    ).mean(axis=-1, keepdims=True)
+
+    return choice_probability
+
+
+@instrument()
+def simulate_mixed_choice(
+    seed: int,
+    equilibrium: Equilibrium,
+    chunk_size: int = 1_000_000,
+    memory_budget: int = MEMORY_BUDGET
+) -> Equilibrium:
+    """
+    Simulate choices of individuals with random coefficients.
+
+    Individual i draws coefficients beta + L z_i from
+    equilibrium.beta_covariance, then chooses by inverse-CDF sampling
+    from its own logit probabilities. Taste draws and uniforms come from
+    separate streams within each STREAM_BLOCK_SIZE block, so results do
+    not depend on chunk_size. Chunks are shrunk so their temporaries stay
+    within memory_budget bytes.
+
+    Args:
+        seed: Random seed for reproducibility
+        equilibrium: Equilibrium containing model components, including
+            beta_covariance
+        chunk_size: Number of simulations drawn at a time
+        memory_budget: Maximum bytes of temporaries per chunk
+
+    Returns:
+        Updated equilibrium with the simulated choice index vector
+
+    Raises:
+        ValueError: If equilibrium.beta_covariance is not set
+    """
+    if equilibrium.beta_covariance is None:
+        raise ValueError("simulate_mixed_choice requires beta_covariance")
+    covariate = equilibrium.covariate
+    beta = equilibrium.beta
+    choice = equilibrium.choice
+    num_alternative = covariate.shape[-2]
+    num_covariate = beta.shape[0]
+    root = _compute_matrix_root(matrix=equilibrium.beta_covariance)
+
+    # Utility, log-probability, probability and cumulative probability
+    chunk_size = min(
+        chunk_size,
+        _get_chunk_size(
+            row_nbytes=4 * num_alternative * np.dtype(np.float64).itemsize,
+            memory_budget=memory_budget
+        )
+    )
+
+    for start, stop, (taste_generator, choice_generator) in _iterate_stream(
+        seed=seed,
+        num_simulation=choice.shape[0],
+        chunk_size=chunk_size,
+        num_stream=2
+    ):
+        taste = taste_generator.standard_normal((stop - start, num_covariate))
+        beta_individual = beta.T + taste @ root.T
+        if covariate.ndim == 3:
+            utility = np.einsum("njk,nk->nj", covariate[start:stop], beta_individual)
+        else:
+            utility = beta_individual @ covariate.T
+
+        choice_probability = np.exp(
+            compute_log_softmax(utility=utility[..., np.newaxis])[..., 0]
+        )
+        choice[start:stop] = _sample_choice(
+            cumulative_probability=_accumulate_probability(
+                choice_probability=choice_probability
+            ),
+            uniform=choice_generator.random(stop - start)
+        )
+
+    if isinstance(choice, np.memmap):
+        choice.flush()
+
+    return equilibrium
+
+
+def compute_beta_draw(
+    beta: np.ndarray,
+    beta_covariance: np.ndarray,
+    normal_draw: np.ndarray
+) -> np.ndarray:
+    """
+    Transform standard normal draws into coefficient draws.
+
+    Args:
+        beta: Vector of mean coefficients
+        beta_covariance: Covariance matrix of the coefficients
+        normal_draw: Standard normal draws of shape (num_draw, num_covariate)
+
+    Returns:
+        Coefficient draws of shape (num_draw, num_covariate)
+    """
+    root = _compute_matrix_root(matrix=np.asarray(beta_covariance))
+    beta_draw: np.ndarray = beta.T + normal_draw @ root.T
+    return beta_draw
+
+
+@lru_cache(maxsize=32)
+def make_normal_draw(
+    num_draw: int,
+    num_dimension: int,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Make standard normal quasi-random draws from a scrambled Halton sequence.
+
+    Results are cached by argument and returned read-only, so the draws are
+    generated once and shared by all calls.
+
+    Args:
+        num_draw: Number of draws
+        num_dimension: Number of dimensions
+        seed: Seed of the Halton scrambling
+
+    Returns:
+        Matrix of shape (num_draw, num_dimension)
+    """
+    normal_draw = _compute_normal_quantile(
+        probability=make_halton_draw(
+            num_draw=num_draw,
+            num_dimension=num_dimension,
+            seed=seed
+        )
+    )
+    normal_draw.setflags(write=False)
+    return normal_draw
+
+
+@lru_cache(maxsize=32)
+def make_halton_draw(
+    num_draw: int,
+    num_dimension: int,
+    seed: int = 0,
+    scramble: bool = True
+) -> np.ndarray:
+    """
+    Make uniform quasi-random draws from a (scrambled) Halton sequence.
+
+    Dimension d uses the d-th prime as its base. With scramble, the digits
+    of each dimension are relabelled by a random permutation of the base,
+    which breaks the correlation between dimensions with large bases. The
+    infinite tail of zero digits is relabelled too, so draws stay strictly
+    inside (0, 1). The point with index zero is skipped.
+
+    Args:
+        num_draw: Number of draws
+        num_dimension: Number of dimensions
+        seed: Seed of the digit permutations
+        scramble: Whether to scramble the digits
+
+    Returns:
+        Read-only matrix of shape (num_draw, num_dimension) on (0, 1)
+    """
+    generator = np.random.default_rng(seed)
+    index = np.arange(1, num_draw + 1)
+    halton_draw = np.empty((num_draw, num_dimension))
+
+    for dimension, base in enumerate(_get_prime(num_prime=num_dimension)):
+        permutation = (
+            generator.permutation(base) if scramble else np.arange(base)
+        ).astype(np.float64)
+        num_digit = int(np.ceil(np.log(num_draw + 1) / np.log(base))) + 1
+
+        value = np.zeros(num_draw)
+        remaining = index.copy()
+        scale = 1.0 / base
+        for _ in range(num_digit):
+            value += permutation[remaining % base] * scale
+            remaining //= base
+            scale /= base
+        # Trailing zero digits, each relabelled to permutation[0]
+        value += permutation[0] * scale * base / (base - 1)
+        halton_draw[:, dimension] = value
+
+    halton_draw.setflags(write=False)
+    return halton_draw
+
+
+def _get_prime(
+    num_prime: int
+) -> List[int]:
+    """
+    Get the first prime numbers.
+
+    Args:
+        num_prime: Number of primes
+
+    Returns:
+        List of the first num_prime primes
+    """
+    prime: List[int] = []
+    candidate = 2
+    while len(prime) < num_prime:
+        if all(candidate % p for p in prime if p * p <= candidate):
+            prime.append(candidate)
+        candidate += 1
+    return prime
+
+
+def _compute_normal_quantile(
+    probability: np.ndarray
+) -> np.ndarray:
+    """
+    Compute standard normal quantiles by Acklam's rational approximation.
+
+    The relative error is below 1.2e-9, far below quasi-Monte Carlo error.
+
+    Args:
+        probability: Probabilities on (0, 1)
+
+    Returns:
+        Standard normal quantiles
+    """
+    a, b, c, d = _QUANTILE_A, _QUANTILE_B, _QUANTILE_C, _QUANTILE_D
+    p = np.clip(probability, 1e-300, 1 - 1e-16)
+    quantile = np.empty_like(p)
+
+    # Central region
+    central = (p > 0.02425) & (p < 1 - 0.02425)
+    q = p[central] - 0.5
+    r = q * q
+    quantile[central] = (
+        (((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q
+        / (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1)
+    )
+
+    # Tails, using the symmetry of the normal distribution
+    tail = ~central
+    lower = p[tail] <= 0.5
+    q = np.sqrt(-2 * np.log(np.where(lower, p[tail], 1 - p[tail])))
+    value = (
+        (((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5])
+        / ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1)
+    )
+    quantile[tail] = np.where(lower, value, -value)
+
+    return quantile
+
+
+def _compute_matrix_root(
+    matrix: np.ndarray
+) -> np.ndarray:
+    """
+    Compute a square root L of a covariance matrix with L L' = matrix.
+
+    Uses the eigendecomposition, so singular covariance matrices (fixed
+    coefficients) are allowed.
+
+    Args:
+        matrix: Symmetric positive semidefinite matrix
+
+    Returns:
+        Matrix root of the same shape
+    """
+    eigenvalue, eigenvector = np.linalg.eigh(matrix)
+    root: np.ndarray = eigenvector * np.sqrt(np.maximum(eigenvalue, 0))
+    return root
@@ -0,0 +1,219 @@
+import csv
+import multiprocessing
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from statistics import NormalDist
+from typing import Any, Dict, Optional
+
+from .estimate import estimate_beta
+from .simulate import (
+    WORKER_START_METHOD,
+    _map_in_order,
+    make_equilibrium,
+    simulate_choice,
+)
+
+
+def run_monte_carlo(
+    config: Dict[str, Any],
+    num_replication: int,
+    seed: int,
+    output_path: Optional[str] = None,
+    num_worker: Optional[int] = 1,
+    confidence: float = 0.95
+) -> Dict[str, Any]:
+    """
+    Run simulate-and-estimate replications and summarize estimator accuracy.
+
+    Replication r draws its covariate and choice seeds from
+    np.random.SeedSequence(seed).spawn(num_replication)[r], so results do
+    not depend on num_worker. Each replication runs make_equilibrium,
+    simulate_choice and estimate_beta and returns only its estimates.
+    Rows are appended to output_path as they arrive, and the summary is
+    accumulated on the fly, so no replication's choices are kept.
+
+    Args:
+        config: Keyword arguments of make_equilibrium, such as
+            num_simulation, num_alternative, num_covariate and the true
+            beta (all ones if omitted)
+        num_replication: Number of replications
+        seed: Master seed of the replications
+        output_path: CSV file to stream per-replication results to, or None
+        num_worker: Number of worker processes. None uses all CPUs; 1 runs
+            in the current process.
+        confidence: Confidence level of the intervals used for coverage
+
+    Returns:
+        Dictionary with num_replication, num_converged, and per-coefficient
+        beta, bias, rmse, standard_deviation, mean_standard_error and
+        coverage
+    """
+    if num_worker is None:
+        num_worker = os.cpu_count() or 1
+    critical_value = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    replication_argument = (
+        {
+            "config": config,
+            "replication": replication,
+            "seed_sequence": seed_sequence
+        }
+        for replication, seed_sequence in enumerate(
+            np.random.SeedSequence(seed).spawn(num_replication)
+        )
+    )
+
+    total: Dict[str, Any] = {}
+    with (
+        ProcessPoolExecutor(
+            max_workers=num_worker,
+            mp_context=multiprocessing.get_context(WORKER_START_METHOD)
+        )
+        if num_worker > 1
+        else nullcontext()
+    ) as executor, (
+        open(output_path, "w", newline="") if output_path else nullcontext()
+    ) as f:
+        row_iterator = (
+            map(_run_replication, replication_argument)
+            if executor is None
+            else _map_in_order(
+                executor=executor,
+                function=_run_replication,
+                iterable=replication_argument,
+                max_pending=2 * num_worker
+            )
+        )
+        writer = None
+        for row in row_iterator:
+            if f is not None:
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+                f.flush()
+            _accumulate_summary(
+                total=total,
+                row=row,
+                critical_value=critical_value
+            )
+
+    return _summarize(total=total)
+
+
+def _run_replication(
+    replication_argument: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Run one simulate-and-estimate replication.
+
+    Args:
+        replication_argument: Dictionary with config, replication index and
+            the replication's seed_sequence
+
+    Returns:
+        Flat row with the replication index, convergence, log-likelihood,
+        and true beta, estimate and standard error of each coefficient
+    """
+    covariate_seed, choice_seed = (
+        replication_argument["seed_sequence"].generate_state(2)
+    )
+
+    np.random.seed(covariate_seed)
+    equilibrium = make_equilibrium(**replication_argument["config"])
+    equilibrium = simulate_choice(
+        seed=int(choice_seed),
+        equilibrium=equilibrium
+    )
+    estimate = estimate_beta(equilibrium=equilibrium)
+
+    row = {
+        "replication": replication_argument["replication"],
+        "converged": estimate["converged"],
+        "num_iteration": estimate["num_iteration"],
+        "log_likelihood": estimate["log_likelihood"]
+    }
+    for k, (beta, beta_hat, standard_error) in enumerate(zip(
+        equilibrium.beta.ravel(),
+        estimate["beta"].ravel(),
+        estimate["standard_error"].ravel()
+    )):
+        row[f"beta_{k}"] = float(beta)
+        row[f"beta_hat_{k}"] = float(beta_hat)
+        row[f"standard_error_{k}"] = float(standard_error)
+
+    return row
+
+
+def _accumulate_summary(
+    total: Dict[str, Any],
+    row: Dict[str, Any],
+    critical_value: float
+) -> None:
+    """
+    Add one replication to the running sums of the summary.
+
+    Args:
+        total: Running sums, updated in place
+        row: Replication row from _run_replication
+        critical_value: Normal critical value of the confidence intervals
+    """
+    num_covariate = sum(name.startswith("beta_hat_") for name in row)
+    beta = np.array([row[f"beta_{k}"] for k in range(num_covariate)])
+    beta_hat = np.array([row[f"beta_hat_{k}"] for k in range(num_covariate)])
+    standard_error = np.array(
+        [row[f"standard_error_{k}"] for k in range(num_covariate)]
+    )
+    error = beta_hat - beta
+
+    if not total:
+        total.update({
+            "num_replication": 0,
+            "num_converged": 0,
+            "beta": beta,
+            "error": np.zeros(num_covariate),
+            "squared_error": np.zeros(num_covariate),
+            "standard_error": np.zeros(num_covariate),
+            "covered": np.zeros(num_covariate)
+        })
+    total["num_replication"] += 1
+    total["num_converged"] += int(row["converged"])
+    total["error"] += error
+    total["squared_error"] += error**2
+    total["standard_error"] += standard_error
+    total["covered"] += np.abs(error) <= critical_value * standard_error
+
+
+def _summarize(
+    total: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Turn running sums into bias, RMSE and coverage summaries.
+
+    Args:
+        total: Running sums from _accumulate_summary
+
+    Returns:
+        Summary dictionary as returned by run_monte_carlo
+    """
+    num_replication = total.get("num_replication", 0)
+    if num_replication == 0:
+        return {"num_replication": 0, "num_converged": 0}
+
+    bias = total["error"] / num_replication
+    mean_squared_error = total["squared_error"] / num_replication
+
+    summary = {
+        "num_replication": num_replication,
+        "num_converged": total["num_converged"],
+        "beta": total["beta"],
+        "bias": bias,
+        "rmse": np.sqrt(mean_squared_error),
+        "standard_deviation": np.sqrt(np.maximum(mean_squared_error - bias**2, 0)),
+        "mean_standard_error": total["standard_error"] / num_replication,
+        "coverage": total["covered"] / num_replication
+    }
+
+    return summary
@@ -0,0 +1,213 @@
+import numpy as np
+from functools import partial
+from typing import Optional
+
+from .instrument import instrument
+from .simulate import (
+    MEMORY_BUDGET,
+    Equilibrium,
+    compute_log_softmax,
+    compute_utility,
+    simulate_choice,
+)
+
+
+def compute_nested_choice_probability(
+    covariate: np.ndarray,
+    beta: np.ndarray,
+    nest: np.ndarray,
+    dissimilarity: np.ndarray,
+    available: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Compute nested logit choice probabilities.
+
+    Args:
+        covariate: Matrix of covariates, or tensor of covariates by market
+        beta: Vector of coefficients
+        nest: Integer vector of length num_alternative giving the nest of
+            each alternative
+        dissimilarity: Dissimilarity parameter of each nest, indexed by the
+            values of nest. A value of one for every nest gives the
+            multinomial logit.
+        available: Boolean mask of alternatives in the choice set, as for
+            compute_choice_probability
+
+    Returns:
+        Vector of choice probabilities, or (num_market, num_alternative, 1)
+        tensor
+    """
+    choice_probability: np.ndarray = np.exp(compute_log_nested_choice_probability(
+        covariate=covariate,
+        beta=beta,
+        nest=nest,
+        dissimilarity=dissimilarity,
+        available=available
+    ))
+
+    return choice_probability
+
+
+def compute_log_nested_choice_probability(
+    covariate: np.ndarray,
+    beta: np.ndarray,
+    nest: np.ndarray,
+    dissimilarity: np.ndarray,
+    available: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Compute nested logit log choice probabilities.
+
+    Args:
+        covariate: Matrix of covariates, or tensor of covariates by market
+        beta: Vector of coefficients
+        nest: Integer vector giving the nest of each alternative
+        dissimilarity: Dissimilarity parameter of each nest, indexed by the
+            values of nest
+        available: Boolean mask of alternatives in the choice set, as for
+            compute_choice_probability
+
+    Returns:
+        Log choice probabilities shaped like compute_log_choice_probability's
+    """
+    utility = compute_utility(covariate=covariate, beta=beta)
+
+    return compute_log_nested_softmax(
+        utility=utility,
+        nest=nest,
+        dissimilarity=dissimilarity,
+        available=available
+    )
+
+
+@instrument()
+def compute_log_nested_softmax(
+    utility: np.ndarray,
+    nest: np.ndarray,
+    dissimilarity: np.ndarray,
+    available: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Normalize utilities into nested logit log choice probabilities.
+
+    With nest g of alternative j, dissimilarity lambda_g and inclusive value
+    I_g = log sum_{k in g} exp(V_k / lambda_g),
+
+        log P_j = (V_j / lambda_g - I_g) + log softmax_g(lambda_g I_g).
+
+    Alternatives are sorted by nest once, so every nest is a contiguous
+    segment. Inclusive values are then segment-wise log-sum-exps from
+    np.maximum.reduceat and np.add.reduceat, without a Python loop over
+    nests, and the upper level reuses compute_log_softmax. Nests whose
+    alternatives are all unavailable drop out of the upper level.
+
+    Args:
+        utility: Utilities with alternatives on the second-to-last axis
+        nest: Integer vector giving the nest of each alternative
+        dissimilarity: Dissimilarity parameter of each nest, indexed by the
+            values of nest
+        available: Boolean mask over the leading axes of utility marking
+            alternatives in the choice set. All are available if None.
+
+    Returns:
+        Log choice probabilities with the same shape as utility
+    """
+    nest = np.asarray(nest)
+    dissimilarity = np.asarray(dissimilarity, dtype=np.float64)
+    if available is not None:
+        utility = np.where(available[..., np.newaxis], utility, -np.inf)
+
+    # Sort alternatives into contiguous nest segments
+    order = np.argsort(nest, kind="stable")
+    sorted_nest = nest[order]
+    segment_start = np.flatnonzero(
+        np.concatenate(([True], sorted_nest[1:] != sorted_nest[:-1]))
+    )
+    segment_length = np.diff(np.append(segment_start, sorted_nest.shape[0]))
+    nest_dissimilarity = dissimilarity[sorted_nest[segment_start]]
+
+    # Lower level: log-sum-exp of scaled utilities within each nest
+    scaled_utility = (
+        np.take(utility, order, axis=-2)
+        / dissimilarity[sorted_nest][:, np.newaxis]
+    )
+    max_utility = np.maximum.reduceat(scaled_utility, segment_start, axis=-2)
+    max_utility[~np.isfinite(max_utility)] = 0
+    shifted_utility = scaled_utility - np.repeat(max_utility, segment_length, axis=-2)
+    sum_exp = np.add.reduceat(
+        np.exp(shifted_utility),
+        segment_start,
+        axis=-2,
+        dtype=np.float64
+    )
+    empty = sum_exp == 0
+    sum_exp[empty] = 1
+    log_sum_exp = np.log(sum_exp)
+    inclusive_value = np.where(empty, -np.inf, max_utility + log_sum_exp)
+
+    # Upper level: logit over nests with utilities lambda_g I_g
+    log_nest_probability = compute_log_softmax(
+        utility=nest_dissimilarity[:, np.newaxis] * inclusive_value
+    )
+    sorted_log_probability = (
+        shifted_utility
+        - np.repeat(log_sum_exp, segment_length, axis=-2)
+        + np.repeat(log_nest_probability, segment_length, axis=-2)
+    )
+
+    # Restore the original order of alternatives
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(order.shape[0])
+    log_probability: np.ndarray = np.take(
+        sorted_log_probability,
+        inverse,
+        axis=-2
+    ).astype(utility.dtype, copy=False)
+
+    return log_probability
+
+
+def simulate_nested_choice(
+    seed: int,
+    equilibrium: Equilibrium,
+    nest: np.ndarray,
+    dissimilarity: np.ndarray,
+    chunk_size: int = 1_000_000,
+    memory_budget: int = MEMORY_BUDGET,
+    num_worker: Optional[int] = 1
+) -> Equilibrium:
+    """
+    Simulate nested logit choices.
+
+    Runs simulate_choice with nested logit probabilities. Draws, alias
+    tables for large choice sets, chunking and workers are therefore the
+    same as for the multinomial logit, and for a given seed the simulated
+    choices do not depend on chunk_size or num_worker.
+
+    Args:
+        seed: Random seed for reproducibility
+        equilibrium: Equilibrium containing model components
+        nest: Integer vector giving the nest of each alternative
+        dissimilarity: Dissimilarity parameter of each nest, indexed by the
+            values of nest
+        chunk_size: Number of simulations drawn at a time
+        memory_budget: Maximum bytes of temporaries per chunk with
+            individual covariates
+        num_worker: Number of worker processes simulating blocks in
+            parallel. None uses all CPUs; 1 runs in the current process.
+
+    Returns:
+        Updated equilibrium with the simulated choice index vector
+    """
+    return simulate_choice(
+        seed=seed,
+        equilibrium=equilibrium,
+        chunk_size=chunk_size,
+        memory_budget=memory_budget,
+        num_worker=num_worker,
+        probability_function=partial(
+            compute_nested_choice_probability,
+            nest=np.asarray(nest),
+            dissimilarity=np.asarray(dissimilarity, dtype=np.float64)
+        )
+    )
@@ -0,0 +1,153 @@
+import numpy as np
+from typing import Any, Dict, Optional
+
+from .fixed_point import solve_fixed_point
+from .instrument import instrument
+from .simulate import compute_log_softmax, compute_utility
+
+
+@instrument()
+def solve_price_equilibrium(
+    covariate: np.ndarray,
+    beta: np.ndarray,
+    price_coefficient: float,
+    marginal_cost: np.ndarray,
+    ownership: np.ndarray,
+    price_initial: Optional[np.ndarray] = None,
+    outside_option: bool = True,
+    tolerance: float = 1e-12,
+    max_iteration: int = 1000,
+    acceleration: str = "squarem"
+) -> Dict[str, Any]:
+    """
+    Solve for multi-product Bertrand-Nash prices under logit demand.
+
+    Utility is covariate @ beta + price_coefficient * price, with an outside
+    good of utility zero if outside_option. Firms set the prices of the
+    products they own to maximize joint profit. Following Morrow and
+    Skerlos (2011), the logit first-order conditions are rewritten as the
+    markup fixed point
+
+        markup_j = -1 / price_coefficient + sum_k O_kj s_k markup_k,
+
+    with O the ownership matrix and s the shares at price = marginal_cost +
+    markup. Unlike Newton's method on the first-order conditions, this map
+    needs no Jacobian inverse. It is solved for all markets at once by
+    solve_fixed_point with SQUAREM acceleration, and each market stops
+    iterating once it has converged.
+
+    Args:
+        covariate: Non-price covariates, shared (num_alternative,
+            num_covariate) or by market (num_market, num_alternative,
+            num_covariate)
+        beta: Vector of non-price coefficients
+        price_coefficient: Negative coefficient of price in utility
+        marginal_cost: Marginal costs of shape (num_alternative,) or
+            (num_market, num_alternative)
+        ownership: Matrix with O[j, k] = 1 if products j and k have the same
+            owner, shared (num_alternative, num_alternative) or by market
+        price_initial: Starting prices, marginal cost plus the
+            single-product logit markup -1 / price_coefficient if None
+        outside_option: Whether consumers can choose an outside good
+        tolerance: Convergence threshold on the sup norm of markup changes
+        max_iteration: Maximum number of SQUAREM cycles
+        acceleration: "squarem" or "none", as for solve_fixed_point
+
+    Returns:
+        Dictionary with price, markup and share of shape (num_market,
+        num_alternative), and per-market converged, num_iteration,
+        num_evaluation and residual (sup norm of the last markup step)
+    """
+    if price_coefficient >= 0:
+        raise ValueError("price_coefficient must be negative")
+
+    mean_utility = compute_utility(covariate=covariate, beta=beta)[..., 0]
+    marginal_cost = np.asarray(marginal_cost, dtype=np.float64)
+    num_market = max(
+        mean_utility.shape[0] if mean_utility.ndim == 2 else 1,
+        marginal_cost.shape[0] if marginal_cost.ndim == 2 else 1
+    )
+    num_alternative = mean_utility.shape[-1]
+    mean_utility = np.broadcast_to(mean_utility, (num_market, num_alternative))
+    marginal_cost = np.broadcast_to(marginal_cost, (num_market, num_alternative))
+    ownership = np.asarray(ownership, dtype=np.float64)
+
+    def update_markup(markup: np.ndarray, market: np.ndarray) -> np.ndarray:
+        share = compute_price_share(
+            mean_utility=mean_utility[market],
+            price=marginal_cost[market] + markup,
+            price_coefficient=price_coefficient,
+            outside_option=outside_option
+        )
+        # Profit of each product's owner, summed over the products it owns
+        owned_profit: np.ndarray = (
+            (share * markup) @ ownership
+            if ownership.ndim == 2
+            else np.einsum("mkj,mk->mj", ownership[market], share * markup)
+        )
+        return owned_profit - 1 / price_coefficient
+
+    markup_initial = (
+        np.full((num_market, num_alternative), -1 / price_coefficient)
+        if price_initial is None
+        else np.broadcast_to(price_initial, (num_market, num_alternative))
+        - marginal_cost
+    )
+    solution = solve_fixed_point(
+        function=update_markup,
+        initial=markup_initial,
+        tolerance=tolerance,
+        max_iteration=max_iteration,
+        acceleration=acceleration
+    )
+    markup = solution["value"]
+    price = marginal_cost + markup
+
+    equilibrium = {
+        "price": price,
+        "markup": markup,
+        "share": compute_price_share(
+            mean_utility=mean_utility,
+            price=price,
+            price_coefficient=price_coefficient,
+            outside_option=outside_option
+        ),
+        "converged": solution["converged"],
+        "num_iteration": solution["num_iteration"],
+        "num_evaluation": solution["num_evaluation"],
+        "residual": solution["residual"]
+    }
+
+    return equilibrium
+
+
+def compute_price_share(
+    mean_utility: np.ndarray,
+    price: np.ndarray,
+    price_coefficient: float,
+    outside_option: bool = True
+) -> np.ndarray:
+    """
+    Compute logit market shares at given prices.
+
+    Args:
+        mean_utility: Non-price utilities of shape (num_market,
+            num_alternative)
+        price: Prices of the same shape
+        price_coefficient: Coefficient of price in utility
+        outside_option: Whether to include an outside good of utility zero
+
+    Returns:
+        Shares of the inside goods, of shape (num_market, num_alternative)
+    """
+    utility = mean_utility + price_coefficient * price
+    num_alternative = utility.shape[-1]
+    if outside_option:
+        utility = np.concatenate(
+            (utility, np.zeros(utility.shape[:-1] + (1,))),
+            axis=-1
+        )
+    log_share = compute_log_softmax(utility=utility[..., np.newaxis])[..., 0]
+    share: np.ndarray = np.exp(log_share[..., :num_alternative])
+
+    return share
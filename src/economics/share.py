@@ -0,0 +1,225 @@
+import math
+import numpy as np
+from typing import Any, Callable, Dict, Optional
+
+from .instrument import instrument
+from .simulate import (
+    MEMORY_BUDGET,
+    Equilibrium,
+    _get_chunk_size,
+    _require_fixed_coefficient,
+    compute_choice_probability,
+    get_choice_dtype,
+    iterate_choice,
+)
+
+
+@instrument()
+def simulate_share(
+    seed: int,
+    equilibrium: Equilibrium,
+    num_simulation: Optional[int] = None,
+    chunk_size: int = 1_000_000,
+    memory_budget: int = MEMORY_BUDGET,
+    num_worker: Optional[int] = 1,
+    probability_function: Optional[Callable[..., np.ndarray]] = None
+) -> Dict[str, Any]:
+    """
+    Simulate market shares without storing individual choices.
+
+    Choices are drawn chunk by chunk by iterate_choice and reduced to
+    per-alternative counts with np.bincount. Neither the choice vector nor
+    a (num_simulation, num_alternative) matrix is held. With shared
+    covariates, memory is O(num_alternative) however many simulations are
+    requested, and equilibrium.choice is not touched. For a given seed the
+    counts are those of simulate_choice with the same number of
+    simulations.
+
+    The simulated shares are compared with the model probabilities, which
+    are averaged over individuals when covariates vary by individual.
+    Standard errors are the binomial sqrt(p (1 - p) / N) at the simulated
+    share. The Pearson chi-square test pools alternatives with positive
+    probability. With individual covariates it is conservative, because
+    choices then vary less than under a common probability vector.
+
+    Args:
+        seed: Random seed for reproducibility
+        equilibrium: Equilibrium containing covariate and beta
+        num_simulation: Number of simulations, equilibrium.num_simulation if
+            None. Must match the covariates when they vary by individual.
+        chunk_size: Number of simulations drawn at a time
+        memory_budget: Maximum bytes of temporaries per chunk with
+            individual covariates
+        num_worker: Number of worker processes simulating blocks in
+            parallel. None uses all CPUs; 1 runs in the current process.
+        probability_function: Function of covariate and beta returning
+            choice probabilities, or None for the multinomial logit
+
+    Returns:
+        Dictionary with num_simulation, count, share, standard_error and
+        probability per alternative, and chi_square, degrees_of_freedom
+        and p_value of the goodness-of-fit test
+
+    Raises:
+        ValueError: If equilibrium.beta_covariance is set
+    """
+    _require_fixed_coefficient(equilibrium=equilibrium, function="simulate_share")
+    covariate = equilibrium.covariate
+    num_alternative = equilibrium.num_alternative
+    if num_simulation is None:
+        num_simulation = equilibrium.num_simulation
+    if covariate.ndim == 3 and covariate.shape[0] != num_simulation:
+        raise ValueError("num_simulation must match the individual covariates")
+
+    # A zero-stride stand-in gives iterate_choice the length and dtype only
+    choice = np.broadcast_to(
+        np.array(-1, dtype=get_choice_dtype(num_alternative=num_alternative)),
+        (num_simulation,)
+    )
+    count = np.zeros(num_alternative, dtype=np.int64)
+    for _, choice_chunk in iterate_choice(
+        seed=seed,
+        equilibrium=Equilibrium(
+            covariate=covariate,
+            beta=equilibrium.beta,
+            choice=choice
+        ),
+        chunk_size=chunk_size,
+        memory_budget=memory_budget,
+        num_worker=num_worker,
+        probability_function=probability_function
+    ):
+        count += np.bincount(choice_chunk, minlength=num_alternative)
+
+    # The logit default applies to the model probabilities only. Passing
+    # None keeps iterate_choice on its alias-table and fused logit paths.
+    probability = _compute_mean_probability(
+        covariate=covariate,
+        beta=equilibrium.beta,
+        probability_function=probability_function or compute_choice_probability,
+        memory_budget=memory_budget
+    )
+    share = count / max(num_simulation, 1)
+    standard_error = np.sqrt(share * (1 - share) / max(num_simulation, 1))
+
+    # Pearson chi-square over alternatives that can be chosen
+    support = probability > 0
+    expected = num_simulation * probability[support]
+    chi_square = float(np.sum((count[support] - expected)**2 / expected))
+    degrees_of_freedom = int(np.count_nonzero(support)) - 1
+
+    result = {
+        "num_simulation": num_simulation,
+        "count": count,
+        "share": share,
+        "standard_error": standard_error,
+        "probability": probability,
+        "chi_square": chi_square,
+        "degrees_of_freedom": degrees_of_freedom,
+        "p_value": compute_chi_square_survival(
+            statistic=chi_square,
+            degrees_of_freedom=degrees_of_freedom
+        )
+    }
+
+    return result
+
+
+def compute_chi_square_survival(
+    statistic: float,
+    degrees_of_freedom: int
+) -> float:
+    """
+    Compute the upper tail probability of the chi-square distribution.
+
+    This is the regularized upper incomplete gamma function Q(k/2, x/2).
+    It uses the series expansion below a + 1 and the Lentz continued
+    fraction above, as in Numerical Recipes.
+
+    Args:
+        statistic: Chi-square statistic x
+        degrees_of_freedom: Degrees of freedom k
+
+    Returns:
+        P(X >= statistic) for X chi-square with k degrees of freedom, or
+        NaN if k is not positive
+    """
+    if degrees_of_freedom <= 0:
+        return float("nan")
+    if statistic <= 0:
+        return 1.0
+
+    a = degrees_of_freedom / 2
+    x = statistic / 2
+    log_prefactor = a * math.log(x) - x - math.lgamma(a)
+    epsilon = 1e-15
+    tiny = 1e-300
+
+    if x < a + 1:
+        # Series for the lower incomplete gamma function
+        term = 1 / a
+        total = term
+        denominator = a
+        for _ in range(10_000):
+            denominator += 1
+            term *= x / denominator
+            total += term
+            if abs(term) < abs(total) * epsilon:
+                break
+        return max(0.0, 1 - total * math.exp(log_prefactor))
+
+    # Continued fraction for the upper incomplete gamma function
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    fraction = d
+    for i in range(1, 10_000):
+        coefficient = -i * (i - a)
+        b += 2
+        d = coefficient * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + coefficient / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        fraction *= delta
+        if abs(delta - 1) < epsilon:
+            break
+    return math.exp(log_prefactor) * fraction
+
+
+def _compute_mean_probability(
+    covariate: np.ndarray,
+    beta: np.ndarray,
+    probability_function: Callable[..., np.ndarray],
+    memory_budget: int
+) -> np.ndarray:
+    """
+    Average model choice probabilities over individuals.
+
+    Args:
+        covariate: Matrix of covariates, or tensor of covariates by individual
+        beta: Vector of coefficients
+        probability_function: Function of covariate and beta returning
+            choice probabilities
+        memory_budget: Maximum bytes of temporaries per chunk of individuals
+
+    Returns:
+        Vector of mean choice probabilities
+    """
+    if covariate.ndim == 2:
+        return probability_function(covariate=covariate, beta=beta)[:, 0]
+
+    num_simulation, num_alternative = covariate.shape[:2]
+    total = np.zeros(num_alternative)
+    chunk_size = _get_chunk_size(
+        row_nbytes=4 * num_alternative * np.dtype(np.float64).itemsize,
+        memory_budget=memory_budget
+    )
+    for start in range(0, num_simulation, chunk_size):
+        stop = min(start + chunk_size, num_simulation)
+        total += probability_function(
+            covariate=covariate[start:stop],
+            beta=beta
+        )[..., 0].sum(axis=0)
+    return total / max(num_simulation, 1)
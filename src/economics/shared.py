@@ -0,0 +1,268 @@
+import atexit
+import sys
+import numpy as np
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, Optional, SupportsIndex, Tuple, Union
+
+# Segments created by this process, unlinked by release_array or at exit
+_owned_segment: Dict[str, shared_memory.SharedMemory] = {}
+
+# Segments attached by this process, kept open while it runs
+_attached_segment: Dict[str, shared_memory.SharedMemory] = {}
+
+
+class SharedArray(np.ndarray):
+    """
+    NumPy array backed by a multiprocessing.shared_memory segment.
+
+    Pickling a SharedArray, or a contiguous view of one such as a block of
+    rows, sends only the segment name, byte offset, shape and dtype. The
+    receiving process maps the same memory with attach_array. Process pool
+    workers therefore get zero-copy views instead of copies.
+    Non-contiguous views are pickled as ordinary arrays. So are ufunc
+    results and copies, which live outside the segment and do not keep it.
+    """
+
+    segment: Optional[shared_memory.SharedMemory]
+
+    def __array_finalize__(self, obj: Any) -> None:
+        segment = getattr(obj, "segment", None)
+        if _get_segment_offset(array=self, segment=segment) is None:
+            segment = None
+        self.segment = segment
+
+    def __reduce__(self) -> Union[str, Tuple[Any, ...]]:
+        offset = _get_segment_offset(array=self, segment=self.segment)
+        if self.segment is None or offset is None or not self.flags.c_contiguous:
+            return np.asarray(self).__reduce__()
+        return (
+            attach_array,
+            (self.segment.name, offset, self.shape, self.dtype.str)
+        )
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> Union[str, Tuple[Any, ...]]:
+        return self.__reduce__()
+
+
+def share_array(
+    array: np.ndarray
+) -> SharedArray:
+    """
+    Copy an array into a new shared memory segment.
+
+    The calling process owns the segment. It stays alive until
+    release_array is called or the process exits. If the process dies
+    without cleaning up, the multiprocessing resource tracker unlinks it.
+    Workers only attach, so a crashing worker never removes a segment that
+    others still use.
+
+    Args:
+        array: Array to share
+
+    Returns:
+        SharedArray with the same contents
+    """
+    array = np.asarray(array)
+    segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    _owned_segment[segment.name] = segment
+    shared = np.ndarray(
+        array.shape,
+        dtype=array.dtype,
+        buffer=segment.buf
+    ).view(SharedArray)
+    shared.segment = segment
+    shared[...] = array
+    return shared
+
+
+def attach_array(
+    name: str,
+    offset: int,
+    shape: Tuple[int, ...],
+    dtype: str
+) -> SharedArray:
+    """
+    Map an array from an existing shared memory segment without copying.
+
+    This is what unpickling a SharedArray calls. Each segment is opened
+    once per process and kept open while the process runs.
+
+    Args:
+        name: Name of the segment
+        offset: Byte offset of the array within the segment
+        shape: Shape of the array
+        dtype: Dtype string of the array
+
+    Returns:
+        SharedArray view of the segment
+    """
+    segment = _owned_segment.get(name) or _attached_segment.get(name)
+    if segment is None:
+        segment = _attach_segment(name=name)
+        _attached_segment[name] = segment
+    shared = np.ndarray(
+        shape,
+        dtype=np.dtype(dtype),
+        buffer=segment.buf,
+        offset=offset
+    ).view(SharedArray)
+    shared.segment = segment
+    return shared
+
+
+def release_array(
+    array: np.ndarray
+) -> None:
+    """
+    Unlink the shared memory segment of an array created by share_array.
+
+    Existing views, here and in other processes, stay readable until they
+    are dropped. Only the name is removed, so no new process can attach.
+    Arrays without a segment owned by this process are left alone.
+
+    Args:
+        array: SharedArray returned by share_array, or a view of one
+    """
+    segment = getattr(array, "segment", None)
+    if segment is None:
+        return
+    owned_segment = _owned_segment.pop(segment.name, None)
+    if owned_segment is not None:
+        _release_segment(segment=owned_segment)
+
+
+def share_equilibrium(
+    equilibrium: Any
+) -> Any:
+    """
+    Copy the arrays of an equilibrium into shared memory.
+
+    Passing the result, or slices of its arrays, to process pool workers
+    sends segment names instead of array copies. Release it with
+    release_equilibrium, or use shared_equilibrium as a context manager.
+
+    Args:
+        equilibrium: Equilibrium to share
+
+    Returns:
+        Equilibrium of the same class whose arrays are SharedArrays
+    """
+    return type(equilibrium)(**{
+        name: share_array(array=array)
+        for name, array in equilibrium.to_dict().items()
+    })
+
+
+def release_equilibrium(
+    equilibrium: Any
+) -> None:
+    """
+    Unlink the shared memory of an equilibrium from share_equilibrium.
+
+    Args:
+        equilibrium: Equilibrium returned by share_equilibrium
+    """
+    for array in equilibrium.to_dict().values():
+        if isinstance(array, SharedArray):
+            release_array(array=array)
+
+
+@contextmanager
+def shared_equilibrium(
+    equilibrium: Any
+) -> Iterator[Any]:
+    """
+    Share an equilibrium for the duration of a with block.
+
+    Segments are unlinked on exit, including when the block raises because
+    a worker crashed.
+
+    Args:
+        equilibrium: Equilibrium to share
+
+    Yields:
+        Equilibrium whose arrays are SharedArrays
+    """
+    shared = share_equilibrium(equilibrium=equilibrium)
+    try:
+        yield shared
+    finally:
+        release_equilibrium(equilibrium=shared)
+
+
+def _attach_segment(
+    name: str
+) -> shared_memory.SharedMemory:
+    """
+    Open an existing segment without taking ownership of it.
+
+    From Python 3.13 the segment is opened untracked. Before that, opening
+    registers it with the resource tracker. Processes started by
+    multiprocessing share the owner's tracker, where the segment is already
+    registered, so nothing changes and the segment is still unlinked only
+    by its owner.
+
+    Args:
+        name: Name of the segment
+
+    Returns:
+        Attached segment
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _get_segment_offset(
+    array: np.ndarray,
+    segment: Optional[shared_memory.SharedMemory]
+) -> Optional[int]:
+    """
+    Get the byte offset of an array's data within a segment.
+
+    Args:
+        array: Array that may map the segment
+        segment: Segment, or None
+
+    Returns:
+        Offset of the array's first byte, or None if the array's bytes do
+        not all lie within the segment
+    """
+    if segment is None or segment.buf is None:
+        return None
+    base_address = np.frombuffer(
+        segment.buf,
+        dtype=np.uint8
+    ).__array_interface__["data"][0]
+    offset = array.__array_interface__["data"][0] - base_address
+    if 0 <= offset and offset + array.nbytes <= segment.size:
+        return int(offset)
+    return None
+
+
+def _release_segment(
+    segment: shared_memory.SharedMemory
+) -> None:
+    """
+    Unlink a segment and close it if no array still maps it.
+
+    Args:
+        segment: Segment owned by this process
+    """
+    try:
+        segment.unlink()
+    except FileNotFoundError:
+        pass
+    try:
+        segment.close()
+    except BufferError:
+        # Arrays still map the buffer; it is freed when they are dropped
+        pass
+
+
+@atexit.register
+def _release_all() -> None:
+    """Unlink all segments this process still owns."""
+    while _owned_segment:
+        _release_segment(segment=_owned_segment.popitem()[1])
@@ -1,119 +1,1525 @@
 import numpy as np
+import itertools
+import multiprocessing
 import os
-from typing import Dict, Any
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
+from . import backend
+from .instrument import instrument, stage
+from .shared import release_array, share_array
 
+# Default cap, in bytes, on temporaries built per chunk of individuals
+MEMORY_BUDGET = 256 * 2**20
+
+# Number of alternatives from which shared-covariate simulations draw from
+# an alias table instead of searching the cumulative probability
+ALIAS_THRESHOLD = 1024
+
+# Simulations per independent random stream. Each block draws from its own
+# SeedSequence child, so changing this changes the simulated choices.
+STREAM_BLOCK_SIZE = 2**20
+
+# Smallest number of simulations per parallel task. Tasks split stream blocks
+# by advancing the block's generator, so their size does not change the draws.
+MIN_TASK_SIZE = 2**14
+
+# Parallel tasks per worker, so that uneven tasks still balance out
+TASK_PER_WORKER = 4
+
+# Start method of simulation workers. Blocks reach them by pickling, with
+# individual covariates in shared memory, so nothing relies on fork, and
+# forked workers could inherit locked Numba threads from the parent.
+WORKER_START_METHOD = (
+    "forkserver"
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else "spawn"
+)
+
+
+class Equilibrium:
+    """
+    Model components of a simulated logit equilibrium.
+    
+    covariate, beta and choice are stored as given. utility,
+    choice_probability, cumulative_probability and alias_table are computed
+    on first access and cached, so repeated simulations and likelihood
+    evaluations at a fixed beta skip the matrix products. Reassigning
+    covariate or beta clears the cache; after modifying either array in
+    place, call clear_cache.
+    
+    Attributes:
+        covariate: Matrix of covariates, or tensor of covariates by individual
+        beta: Vector of (mean) coefficients
+        choice: Vector of chosen alternative indices, -1 if not simulated
+        beta_covariance: Covariance matrix of random coefficients, or None
+        realized_utility: Utilities plus taste shocks from
+            simulate_structural_choice, or None
+        max_utility: Maximum realized utility of each simulation, or None
+    """
+    
+    __slots__ = (
+        "_covariate",
+        "_beta",
+        "choice",
+        "beta_covariance",
+        "realized_utility",
+        "max_utility",
+        "_utility",
+        "_choice_probability",
+        "_cumulative_probability",
+        "_alias_table",
+    )
+    _covariate: np.ndarray
+    _beta: np.ndarray
+    choice: np.ndarray
+    beta_covariance: Optional[np.ndarray]
+    realized_utility: Optional[np.ndarray]
+    max_utility: Optional[np.ndarray]
+    _utility: Optional[np.ndarray]
+    _choice_probability: Optional[np.ndarray]
+    _cumulative_probability: Optional[np.ndarray]
+    _alias_table: Optional[Dict[str, np.ndarray]]
+    
+    # Stored arrays, in the order economics.storage saves them
+    FIELD = (
+        "covariate",
+        "beta",
+        "choice",
+        "beta_covariance",
+        "realized_utility",
+        "max_utility",
+    )
+    
+    def __init__(
+        self,
+        covariate: np.ndarray,
+        beta: np.ndarray,
+        choice: np.ndarray,
+        beta_covariance: Optional[np.ndarray] = None,
+        realized_utility: Optional[np.ndarray] = None,
+        max_utility: Optional[np.ndarray] = None
+    ) -> None:
+        self._covariate = covariate
+        self._beta = beta
+        self.choice = choice
+        self.beta_covariance = beta_covariance
+        self.realized_utility = realized_utility
+        self.max_utility = max_utility
+        self.clear_cache()
+    
+    def __repr__(self) -> str:
+        shape = ", ".join(
+            f"{name}={getattr(self, name).shape}"
+            for name in self.FIELD
+            if getattr(self, name) is not None
+        )
+        return f"Equilibrium({shape})"
+    
+    @property
+    def covariate(self) -> np.ndarray:
+        return self._covariate
+    
+    @covariate.setter
+    def covariate(self, value: np.ndarray) -> None:
+        self._covariate = value
+        self.clear_cache()
+    
+    @property
+    def beta(self) -> np.ndarray:
+        return self._beta
+    
+    @beta.setter
+    def beta(self, value: np.ndarray) -> None:
+        self._beta = value
+        self.clear_cache()
+    
+    @property
+    def num_simulation(self) -> int:
+        return self.choice.shape[0]
+    
+    @property
+    def num_alternative(self) -> int:
+        return self._covariate.shape[-2]
+    
+    @property
+    def utility(self) -> np.ndarray:
+        """Utility from compute_utility at the mean beta, cached."""
+        if self._utility is None:
+            self._utility = compute_utility(covariate=self._covariate, beta=self._beta)
+        return self._utility
+    
+    @property
+    def choice_probability(self) -> np.ndarray:
+        """
+        Choice probability from the cached utility, cached.
+
+        Raises:
+            ValueError: If beta_covariance is set; see
+                economics.mixed_logit.compute_mixed_choice_probability
+        """
+        _require_fixed_coefficient(
+            equilibrium=self,
+            function="Equilibrium.choice_probability"
+        )
+        if self._choice_probability is None:
+            self._choice_probability = np.exp(compute_log_softmax(utility=self.utility))
+        return self._choice_probability
+    
+    @property
+    def cumulative_probability(self) -> np.ndarray:
+        """Normalized cumulative choice probability, cached."""
+        if self._cumulative_probability is None:
+            self._cumulative_probability = _accumulate_probability(
+                choice_probability=self.choice_probability[..., 0]
+            )
+        return self._cumulative_probability
+    
+    @property
+    def alias_table(self) -> Dict[str, np.ndarray]:
+        """Alias table of the shared choice probability, cached."""
+        if self._alias_table is None:
+            self._alias_table = make_alias_table(
+                choice_probability=self.choice_probability
+            )
+        return self._alias_table
+    
+    def clear_cache(self) -> None:
+        """Drop all cached derived quantities."""
+        self._utility = None
+        self._choice_probability = None
+        self._cumulative_probability = None
+        self._alias_table = None
+    
+    def to_dict(self) -> Dict[str, np.ndarray]:
+        """Return the stored arrays that are set, by field name."""
+        return {
+            name: getattr(self, name)
+            for name in self.FIELD
+            if getattr(self, name) is not None
+        }
+
+
+@instrument()
 def make_equilibrium(
     num_simulation: int, 
     num_alternative: int, 
-    num_covariate: int
-) -> Dict[str, np.ndarray]:
+    num_covariate: int,
+    individual_covariate: bool = False,
+    choice_path: Optional[str] = None,
+    beta_covariance: Optional[np.ndarray] = None,
+    dtype: Any = np.float64,
+    beta: Optional[Iterable[float]] = None
+) -> Equilibrium:
     """
-    Create equilibrium structure with covariates, beta, and choice matrices.
+    Create equilibrium structure with covariates, beta, and choice vector.
+    
+    By default all simulated individuals share one covariate matrix of
+    shape (num_alternative, num_covariate). With individual_covariate the
+    covariates vary by individual and have shape (num_simulation,
+    num_alternative, num_covariate).
+    
+    Choices are stored as one alternative index per simulation, using the
+    smallest integer dtype that holds num_alternative. Entries are -1 until
+    simulate_choice fills them. Use make_choice_matrix to expand them into
+    a dense one-hot matrix. With choice_path the choice vector is a
+    memory-mapped .npy file on disk, for simulations that do not fit in RAM.
+    With beta_covariance, individual coefficients are random with mean beta
+    (random-coefficients logit, see economics.mixed_logit).
+    
+    Covariates and beta are stored in dtype. Covariates are drawn in double
+    precision from the global stream and then rounded, so a float32
+    equilibrium has the same covariates as a float64 one up to rounding.
+    Utilities and probabilities computed from the equilibrium keep dtype.
     
     Args:
         num_simulation: Number of simulations
         num_alternative: Number of choice alternatives
         num_covariate: Number of covariates
+        individual_covariate: Whether covariates vary by individual
+        choice_path: Path of a .npy file to hold the choice vector, or None
+            to keep it in memory
+        beta_covariance: Covariance matrix of individual coefficients, or
+            None for coefficients fixed at beta
+        dtype: Floating dtype of covariates and beta, np.float64 or
+            np.float32
+        beta: Coefficients, one per covariate, or None for all ones
         
     Returns:
-        Dictionary containing covariate, beta, and choice matrices
+        Equilibrium containing covariate and beta matrices and choice vector
     """
     # Generate random covariates
-    covariate = np.random.normal(
-        size=(num_alternative * num_covariate)
-    ).reshape(num_alternative, num_covariate)
+    if individual_covariate:
+        covariate = np.random.normal(
+            size=(num_simulation * num_alternative * num_covariate)
+        ).reshape(num_simulation, num_alternative, num_covariate)
+    else:
+        covariate = np.random.normal(
+            size=(num_alternative * num_covariate)
+        ).reshape(num_alternative, num_covariate)
+    covariate = covariate.astype(dtype, copy=False)
     
-    # Set beta coefficients to 1
-    beta = np.ones(num_covariate).reshape(-1, 1)
+    # Set beta coefficients to 1 unless given
+    if beta is None:
+        beta = np.ones(num_covariate, dtype=dtype)
+    beta = np.asarray(beta, dtype=dtype).reshape(-1, 1)
+    if beta.shape[0] != num_covariate:
+        raise ValueError("beta must have one coefficient per covariate")
     
-    # Initialize choice matrix with zeros
-    choice = np.zeros((num_simulation, num_alternative))
+    # Initialize choice vector as not yet simulated
+    choice_dtype = get_choice_dtype(num_alternative=num_alternative)
+    if choice_path is None:
+        choice = np.empty(num_simulation, dtype=choice_dtype)
+    else:
+        choice = np.lib.format.open_memmap(
+            choice_path,
+            mode="w+",
+            dtype=choice_dtype,
+            shape=(num_simulation,)
+        )
+    choice.fill(-1)
     
-    # Return as dictionary
-    equilibrium = {
-        "covariate": covariate,
-        "beta": beta,
-        "choice": choice
-    }
+    equilibrium = Equilibrium(
+        covariate=covariate,
+        beta=beta,
+        choice=choice,
+        beta_covariance=(
+            None
+            if beta_covariance is None
+            else np.asarray(beta_covariance, dtype=np.float64)
+        )
+    )
     
     return equilibrium
 
 
+def get_choice_dtype(
+    num_alternative: int
+) -> np.dtype:
+    """
+    Get the smallest signed integer dtype for storing choice indices.
+    
+    Args:
+        num_alternative: Number of choice alternatives
+        
+    Returns:
+        int8, int16 or int32 dtype able to hold indices 0..num_alternative-1
+        and the -1 marker for missing choices
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if num_alternative - 1 <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    raise ValueError("num_alternative exceeds the int32 index range")
+
+
+def make_choice_matrix(
+    choice: np.ndarray,
+    num_alternative: int,
+    dtype: Any = np.float64
+) -> np.ndarray:
+    """
+    Expand a choice index vector into a dense one-hot matrix.
+    
+    Args:
+        choice: Vector of chosen alternative indices, -1 for no choice
+        num_alternative: Number of choice alternatives
+        dtype: Data type of the returned matrix
+        
+    Returns:
+        Matrix of shape (num_simulation, num_alternative) with a one in the
+        column of each chosen alternative and zeros elsewhere
+    """
+    choice_matrix = np.zeros((choice.shape[0], num_alternative), dtype=dtype)
+    chosen = np.flatnonzero(choice >= 0)
+    choice_matrix[chosen, choice[chosen]] = 1
+    return choice_matrix
+
+
+@instrument()
 def compute_utility(
     covariate: np.ndarray,
-    beta: np.ndarray
+    beta: np.ndarray,
+    memory_budget: int = MEMORY_BUDGET,
+    dtype: Any = None
 ) -> np.ndarray:
     """
     Compute utility based on covariates and beta parameters.
     
+    A 3-D covariate of shape (num_market, num_alternative, num_covariate),
+    with markets or individuals on the first axis, is evaluated by stacked
+    matrix products over chunks of the first axis. Each chunk's covariates
+    fit within memory_budget bytes, and products are written straight into
+    the result. A shared 2-D covariate takes the plain matrix product.
+    
     Args:
-        covariate: Matrix of covariates
+        covariate: Matrix of covariates, or tensor of covariates by market
         beta: Vector of coefficients
+        memory_budget: Maximum bytes of covariates stacked per product
+        dtype: Floating dtype of the products and the result. If None, the
+            common dtype of covariate and beta.
         
     Returns:
-        Vector of utilities
+        Vector of utilities, or (num_market, num_alternative, 1) tensor
     """
-    utility = covariate @ beta
+    if dtype is None:
+        dtype = np.result_type(covariate, beta)
+    beta = np.asarray(beta, dtype=dtype)
+    if covariate.ndim != 3:
+        utility: np.ndarray = np.asarray(covariate, dtype=dtype) @ beta
+        return utility
+    
+    num_market, num_alternative, num_covariate = covariate.shape
+    utility = np.empty((num_market, num_alternative, beta.shape[1]), dtype=dtype)
+    chunk_size = _get_chunk_size(
+        row_nbytes=num_alternative * num_covariate * covariate.itemsize,
+        memory_budget=memory_budget
+    )
+    for start in range(0, num_market, chunk_size):
+        stop = min(start + chunk_size, num_market)
+        # Stack the chunk's alternatives so that one matrix product covers it
+        np.matmul(
+            covariate[start:stop].reshape(-1, num_covariate).astype(dtype, copy=False),
+            beta,
+            out=utility[start:stop].reshape(-1, beta.shape[1])
+        )
     return utility
 
 
 def compute_choice_probability(
     covariate: np.ndarray, 
-    beta: np.ndarray
+    beta: np.ndarray,
+    available: Optional[np.ndarray] = None,
+    dtype: Any = None
 ) -> np.ndarray:
     """
     Compute choice probabilities using multinomial logit formula.
     
+    beta may hold several coefficient vectors as columns. All of them are
+    then evaluated by one matrix product, and the result has one column
+    per vector. See summarize_choice_probability to reduce many draws to
+    quantiles without holding all columns.
+    
     Args:
-        covariate: Matrix of covariates
+        covariate: Matrix of covariates, or tensor of covariates by market
         beta: Vector of coefficients
+        available: Boolean mask of shape (num_alternative,) or
+            (num_market, num_alternative) marking alternatives in the
+            choice set. All alternatives are available if None.
+        dtype: Floating dtype of utilities and probabilities. If None, the
+            common dtype of covariate and beta.
         
     Returns:
-        Vector of choice probabilities
+        Vector of choice probabilities, or (num_market, num_alternative, 1)
+        tensor. Unavailable alternatives get probability zero.
     """
-    utility = compute_utility(covariate, beta)
-    
-    # Apply exponential and normalize (softmax)
-    exp_utility = np.exp(utility)
-    choice_probability = exp_utility / np.sum(exp_utility)
+    log_choice_probability = compute_log_choice_probability(
+        covariate=covariate,
+        beta=beta,
+        available=available,
+        dtype=dtype
+    )
+    choice_probability: np.ndarray = np.exp(log_choice_probability)
     
     return choice_probability
 
 
+def compute_log_choice_probability(
+    covariate: np.ndarray,
+    beta: np.ndarray,
+    available: Optional[np.ndarray] = None,
+    dtype: Any = None
+) -> np.ndarray:
+    """
+    Compute log choice probabilities using multinomial logit formula.
+    
+    Args:
+        covariate: Matrix of covariates, or tensor of covariates by market
+        beta: Vector of coefficients
+        available: Boolean mask of shape (num_alternative,) or
+            (num_market, num_alternative) marking alternatives in the
+            choice set. All alternatives are available if None.
+        dtype: Floating dtype of utilities and log probabilities. If None,
+            the common dtype of covariate and beta.
+        
+    Returns:
+        Vector of log choice probabilities, or (num_market, num_alternative,
+        1) tensor. Unavailable alternatives get -inf.
+    """
+    utility = compute_utility(covariate=covariate, beta=beta, dtype=dtype)
+    
+    return compute_log_softmax(utility=utility, available=available)
+
+
+@instrument()
+def summarize_choice_probability(
+    covariate: np.ndarray,
+    beta: np.ndarray,
+    quantile: Iterable[float] = (0.025, 0.5, 0.975),
+    available: Optional[np.ndarray] = None,
+    memory_budget: int = MEMORY_BUDGET,
+    dtype: Any = None
+) -> Dict[str, np.ndarray]:
+    """
+    Summarize choice probabilities over many coefficient draws.
+
+    beta holds one draw per column, such as bootstrap or posterior draws.
+    The full (num_alternative, num_draw) probability matrix is never held.
+    The first pass runs over chunks of draws and computes each draw's
+    log-sum-exp from one covariate @ beta product per chunk. The second
+    pass runs over chunks of alternatives. It recomputes their utilities
+    for all draws, normalizes them by the log-sum-exps and reduces them to
+    means and quantiles. Chunks are sized to stay within memory_budget
+    bytes. For the probability matrix itself, pass the (num_covariate,
+    num_draw) beta to compute_choice_probability.
+
+    Args:
+        covariate: Matrix of covariates shared by all draws
+        beta: Matrix of coefficient draws of shape (num_covariate, num_draw)
+        quantile: Quantile levels to report
+        available: Boolean mask of shape (num_alternative,) marking
+            alternatives in the choice set. All are available if None.
+        memory_budget: Maximum bytes of temporaries per chunk
+        dtype: Floating dtype of utilities. If None, the common dtype of
+            covariate and beta. Log-sum-exps are accumulated in float64.
+
+    Returns:
+        Dictionary with quantile_level (num_quantile,), mean
+        (num_alternative,) and quantile (num_quantile, num_alternative).
+        Unavailable alternatives have probability zero.
+    """
+    if covariate.ndim != 2:
+        raise ValueError("covariate must be a matrix shared by all draws")
+    if dtype is None:
+        dtype = np.result_type(covariate, beta)
+    quantile_level = np.asarray(tuple(quantile), dtype=np.float64)
+    num_alternative = covariate.shape[0]
+    num_draw = beta.shape[1]
+    beta = np.asarray(beta, dtype=dtype)
+
+    index = (
+        np.arange(num_alternative)
+        if available is None
+        else np.flatnonzero(available)
+    )
+    covariate = np.asarray(covariate[index], dtype=dtype)
+    mean = np.zeros(num_alternative)
+    quantile_value = np.zeros((quantile_level.shape[0], num_alternative))
+    if index.shape[0] == 0 or num_draw == 0:
+        return {
+            "quantile_level": quantile_level,
+            "mean": mean,
+            "quantile": quantile_value
+        }
+
+    # Pass 1: log-sum-exp of each draw, chunked over draws
+    log_sum_exp = np.empty(num_draw)
+    chunk_size = _get_chunk_size(
+        row_nbytes=2 * index.shape[0] * np.dtype(np.float64).itemsize,
+        memory_budget=memory_budget
+    )
+    for start in range(0, num_draw, chunk_size):
+        stop = min(start + chunk_size, num_draw)
+        utility = covariate @ beta[:, start:stop]
+        max_utility = utility.max(axis=0)
+        log_sum_exp[start:stop] = max_utility + np.log(
+            np.sum(np.exp(utility - max_utility), axis=0, dtype=np.float64)
+        )
+
+    # Pass 2: probabilities of a chunk of alternatives under all draws
+    chunk_size = _get_chunk_size(
+        row_nbytes=3 * num_draw * np.dtype(np.float64).itemsize,
+        memory_budget=memory_budget
+    )
+    for start in range(0, index.shape[0], chunk_size):
+        stop = min(start + chunk_size, index.shape[0])
+        choice_probability = np.exp(covariate[start:stop] @ beta - log_sum_exp)
+        mean[index[start:stop]] = choice_probability.mean(axis=1)
+        quantile_value[:, index[start:stop]] = np.quantile(
+            choice_probability,
+            quantile_level,
+            axis=1
+        )
+
+    summary = {
+        "quantile_level": quantile_level,
+        "mean": mean,
+        "quantile": quantile_value
+    }
+
+    return summary
+
+
+@instrument()
+def compute_log_softmax(
+    utility: np.ndarray,
+    available: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Normalize utilities into log choice probabilities over alternatives.
+    
+    Utilities are shifted by their maximum within each choice set before
+    exponentiating (log-sum-exp), so large utilities do not overflow. The
+    sum of exponentials is accumulated in float64 whatever the dtype of
+    utility, so float32 probabilities still sum to one up to float32
+    rounding of each term.
+    
+    Args:
+        utility: Utilities with alternatives on the second-to-last axis
+        available: Boolean mask over the leading axes of utility marking
+            alternatives in the choice set. All are available if None.
+        
+    Returns:
+        Log choice probabilities with the same shape and dtype as utility.
+        Choice sets with no available alternative are -inf throughout.
+    """
+    if available is not None:
+        utility = np.where(available[..., np.newaxis], utility, -np.inf)
+    
+    # Shift by the maximum; empty choice sets keep a zero shift and log-sum
+    max_utility = np.max(utility, axis=-2, keepdims=True)
+    max_utility[~np.isfinite(max_utility)] = 0
+    shifted_utility = utility - max_utility
+    sum_exp = np.sum(
+        np.exp(shifted_utility),
+        axis=-2,
+        keepdims=True,
+        dtype=np.float64
+    )
+    sum_exp[sum_exp == 0] = 1
+    log_softmax: np.ndarray = (
+        shifted_utility - np.log(sum_exp).astype(utility.dtype, copy=False)
+    )
+    
+    return log_softmax
+
+
+def make_available_mask(
+    num_available: np.ndarray,
+    num_alternative: int
+) -> np.ndarray:
+    """
+    Build an availability mask for ragged choice sets.
+    
+    Each market's alternatives are assumed to occupy the first
+    num_available[m] rows of a covariate tensor padded to num_alternative.
+    
+    Args:
+        num_available: Number of available alternatives in each market
+        num_alternative: Padded number of alternatives
+        
+    Returns:
+        Boolean matrix of shape (num_market, num_alternative)
+    """
+    return np.arange(num_alternative) < np.asarray(num_available)[:, np.newaxis]
+
+
+@instrument()
 def simulate_choice(
     seed: int,
-    equilibrium: Dict[str, np.ndarray]
-) -> Dict[str, np.ndarray]:
+    equilibrium: Equilibrium,
+    chunk_size: int = 1_000_000,
+    legacy_random: bool = False,
+    memory_budget: int = MEMORY_BUDGET,
+    num_worker: Optional[int] = 1,
+    probability_function: Optional[Callable[..., np.ndarray]] = None
+) -> Equilibrium:
     """
     Simulate choices based on multinomial probability.
     
+    Choices are written chunk by chunk into equilibrium.choice in place,
+    so a memory-mapped choice vector from make_equilibrium(choice_path=...)
+    is filled without holding all simulations in memory. See
+    iterate_choice for how draws are made. Utilities and probabilities
+    follow the dtype of the equilibrium (see make_equilibrium). With
+    random coefficients (equilibrium.beta_covariance set) the choices are
+    simulated by economics.mixed_logit.simulate_mixed_choice in the
+    current process instead.
+
+    Args:
+        seed: Random seed for reproducibility
+        equilibrium: Equilibrium containing model components
+        chunk_size: Number of simulations drawn at a time
+        legacy_random: If True, draw from the global np.random stream seeded
+            by np.random.seed(seed) instead of the spawned block streams.
+            This reproduces outputs of the former per-row np.random.choice
+            loop bit for bit, and runs in a single process only.
+        memory_budget: Maximum bytes of temporaries per chunk with
+            individual covariates
+        num_worker: Number of worker processes simulating blocks in
+            parallel. None uses all CPUs; 1 runs in the current process.
+        probability_function: Function of covariate and beta returning
+            choice probabilities shaped like compute_choice_probability's,
+            used instead of the multinomial logit. It must be picklable
+            when num_worker is not 1.
+
+    Returns:
+        Updated equilibrium with the simulated choice index vector
+
+    Raises:
+        ValueError: If beta_covariance is set together with legacy_random
+            or probability_function
+    """
+    if equilibrium.beta_covariance is not None:
+        if legacy_random or probability_function is not None:
+            raise ValueError(
+                "legacy_random and probability_function do not support "
+                "random coefficients"
+            )
+        # Imported here because economics.mixed_logit imports this module
+        from .mixed_logit import simulate_mixed_choice
+        return simulate_mixed_choice(
+            seed=seed,
+            equilibrium=equilibrium,
+            chunk_size=chunk_size,
+            memory_budget=memory_budget
+        )
+    
+    choice = equilibrium.choice
+    
+    for start, choice_chunk in iterate_choice(
+        seed=seed,
+        equilibrium=equilibrium,
+        chunk_size=chunk_size,
+        legacy_random=legacy_random,
+        memory_budget=memory_budget,
+        num_worker=num_worker,
+        probability_function=probability_function
+    ):
+        choice[start:start + choice_chunk.shape[0]] = choice_chunk
+    
+    if isinstance(choice, np.memmap):
+        choice.flush()
+    
+    return equilibrium
+
+
+def iterate_choice(
+    seed: int,
+    equilibrium: Equilibrium,
+    chunk_size: int = 1_000_000,
+    legacy_random: bool = False,
+    memory_budget: int = MEMORY_BUDGET,
+    num_worker: Optional[int] = 1,
+    probability_function: Optional[Callable[..., np.ndarray]] = None
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Generate simulated choices chunk by chunk, in order.
+
+    Each simulation takes one uniform draw and picks the first alternative
+    whose cumulative choice probability exceeds it (inverse-CDF sampling).
+    Simulations are split into blocks of STREAM_BLOCK_SIZE, and block b
+    draws from np.random.SeedSequence(seed).spawn(...)[b]. Within a block,
+    uniforms are drawn chunk by chunk from one sequential stream. In
+    parallel mode blocks are further split into about TASK_PER_WORKER
+    tasks per worker, of at least MIN_TASK_SIZE simulations. A task
+    advances its block's generator past the rows before it, so it draws
+    exactly the uniforms of the serial stream. The simulated choices for a
+    given seed therefore do not depend on chunk_size or num_worker.
+    
+    With shared covariates the equilibrium's cached cumulative probability
+    is used. From ALIAS_THRESHOLD alternatives on, its cached alias table is
+    used instead, so each draw costs O(1) rather than O(log num_alternative).
+    Both are reused across calls while beta and the covariate are unchanged.
+    With individual covariates the cumulative
+    probability is computed per chunk, and chunks are shrunk so their
+    temporaries stay within memory_budget bytes. Utilities and
+    probabilities are computed in the dtype of the equilibrium's
+    covariates. Cumulative probabilities are always float64, so a float32
+    equilibrium samples from correctly normalized probabilities.
+    
+    Only the yielded chunk is held in memory, so consumers can stream any
+    number of simulations. In parallel mode whole tasks are yielded, and
+    at most two tasks per worker are in flight. Individual covariates are
+    then copied once into shared memory, and workers map their blocks
+    from it. Pass an equilibrium from economics.shared.share_equilibrium
+    to skip that copy.
+
+    Args:
+        seed: Random seed for reproducibility
+        equilibrium: Equilibrium containing model components. Only the
+            length and dtype of equilibrium.choice are used.
+        chunk_size: Number of simulations drawn at a time
+        legacy_random: If True, draw from the global np.random stream seeded
+            by np.random.seed(seed) instead of the spawned block streams.
+            Always samples from the cumulative probability.
+        memory_budget: Maximum bytes of temporaries per chunk with
+            individual covariates
+        num_worker: Number of worker processes simulating blocks in
+            parallel. None uses all CPUs; 1 runs in the current process.
+        probability_function: Function of covariate and beta returning
+            choice probabilities, used instead of the multinomial logit.
+            With shared covariates it is evaluated once, and its result is
+            sampled like the cached logit probabilities.
+
+    Yields:
+        Tuples of the first simulation index of the chunk and the vector of
+        chosen alternative indices
+
+    Raises:
+        ValueError: If equilibrium.beta_covariance is set
+    """
+    _require_fixed_coefficient(equilibrium=equilibrium, function="iterate_choice")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    if num_worker is None:
+        num_worker = os.cpu_count() or 1
+    if legacy_random and num_worker != 1:
+        raise ValueError(
+            "legacy_random draws from the global stream and cannot run in parallel"
+        )
+    
+    covariate = equilibrium.covariate
+    beta = equilibrium.beta
+    num_simulation = equilibrium.choice.shape[0]
+    dtype = equilibrium.choice.dtype
+    
+    individual = covariate.ndim == 3
+    cumulative_probability = None
+    alias_table = None
+    if individual:
+        # Utility, log-probability and probability in the covariate dtype,
+        # cumulative probability in float64
+        chunk_size = min(
+            chunk_size,
+            _get_chunk_size(
+                row_nbytes=covariate.shape[1] * (
+                    3 * covariate.itemsize + np.dtype(np.float64).itemsize
+                ),
+                memory_budget=memory_budget
+            )
+        )
+    elif probability_function is not None:
+        choice_probability = probability_function(covariate=covariate, beta=beta)
+        if covariate.shape[0] >= ALIAS_THRESHOLD and not legacy_random:
+            alias_table = make_alias_table(choice_probability=choice_probability)
+        else:
+            cumulative_probability = _accumulate_probability(
+                choice_probability=choice_probability[..., 0]
+            )
+    elif covariate.shape[0] >= ALIAS_THRESHOLD and not legacy_random:
+        alias_table = equilibrium.alias_table
+    else:
+        cumulative_probability = equilibrium.cumulative_probability
+    
+    if legacy_random:
+        np.random.seed(seed)
+        for start in range(0, num_simulation, chunk_size):
+            stop = min(start + chunk_size, num_simulation)
+            yield start, _sample_chunk(
+                covariate=covariate[start:stop] if individual else covariate,
+                beta=beta,
+                cumulative_probability=cumulative_probability,
+                alias_table=None,
+                uniform=np.random.random_sample(stop - start),
+                probability_function=probability_function
+            ).astype(dtype)
+        return
+    
+    # Workers map individual covariates from shared memory instead of
+    # receiving pickled copies of their blocks. Arrays derived from shared
+    # ones, such as ufunc results, are SharedArrays without a segment.
+    share_covariate = (
+        individual
+        and num_worker > 1
+        and (
+            getattr(covariate, "segment", None) is None
+            or not covariate.flags.c_contiguous
+        )
+    )
+    if share_covariate:
+        covariate = share_array(array=covariate)
+    
+    # Spawn one independent stream per block. Parallel tasks are parts of
+    # blocks that skip ahead in the block's stream, so workers and task
+    # sizes only change who draws a row, not what is drawn.
+    task_size = STREAM_BLOCK_SIZE
+    if num_worker > 1:
+        task_size = min(
+            STREAM_BLOCK_SIZE,
+            max(MIN_TASK_SIZE, -(-num_simulation // (TASK_PER_WORKER * num_worker)))
+        )
+    block_start = range(0, num_simulation, STREAM_BLOCK_SIZE)
+    seed_sequence = np.random.SeedSequence(seed).spawn(len(block_start))
+    task_start = [
+        (block, block_start_row, start)
+        for block, block_start_row in enumerate(block_start)
+        for start in range(
+            block_start_row,
+            min(block_start_row + STREAM_BLOCK_SIZE, num_simulation),
+            task_size
+        )
+    ]
+    block_argument = (
+        {
+            "seed_sequence": seed_sequence[block],
+            "offset": start - block_start_row,
+            "num_row": min(
+                task_size,
+                block_start_row + STREAM_BLOCK_SIZE - start,
+                num_simulation - start
+            ),
+            "covariate": (
+                covariate[start:start + task_size] if individual else covariate
+            ),
+            "beta": beta,
+            "cumulative_probability": cumulative_probability,
+            "alias_table": alias_table,
+            "probability_function": probability_function,
+            "chunk_size": chunk_size,
+            "dtype": dtype
+        }
+        for block, block_start_row, start in task_start
+    )
+    
+    if num_worker == 1:
+        for (_, _, start), argument in zip(task_start, block_argument):
+            for choice_chunk in _iterate_block(block_argument=argument):
+                yield start, choice_chunk
+                start += choice_chunk.shape[0]
+        return
+    
+    try:
+        with ProcessPoolExecutor(
+            max_workers=num_worker,
+            mp_context=multiprocessing.get_context(WORKER_START_METHOD)
+        ) as executor:
+            yield from zip(
+                (start for _, _, start in task_start),
+                _map_in_order(
+                    executor=executor,
+                    function=_simulate_block,
+                    iterable=block_argument,
+                    max_pending=2 * num_worker
+                )
+            )
+    finally:
+        if share_covariate:
+            release_array(array=covariate)
+
+
+@instrument()
+def simulate_structural_choice(
+    seed: int,
+    equilibrium: Equilibrium,
+    chunk_size: int = 1_000_000,
+    return_utility: bool = False,
+    return_max_utility: bool = False,
+    memory_budget: int = MEMORY_BUDGET
+) -> Equilibrium:
+    """
+    Simulate choices by maximizing utility with explicit taste shocks.
+    
+    Each simulation draws a Type-I extreme value shock per alternative,
+    adds it to compute_utility output and picks the argmax (Gumbel-max),
+    which reproduces the logit choice probabilities. Shocks are drawn per
+    chunk, and chunks are shrunk so the shock and utility temporaries stay
+    within memory_budget bytes. Streams follow the same STREAM_BLOCK_SIZE
+    blocks as iterate_choice, so results do not depend on chunk_size.
+    
+    The mean of max_utility estimates the expected maximum utility, which
+    for the logit equals the log-sum of exp(utility) plus Euler's constant.
+    
     Args:
         seed: Random seed for reproducibility
-        equilibrium: Dictionary containing model components
+        equilibrium: Equilibrium containing model components
+        chunk_size: Number of simulations drawn at a time
+        return_utility: Whether to store the realized utilities, utility
+            plus shock, as equilibrium.realized_utility of shape
+            (num_simulation, num_alternative)
+        return_max_utility: Whether to store each simulation's maximum
+            realized utility as equilibrium.max_utility
+        memory_budget: Maximum bytes of temporaries per chunk
         
     Returns:
-        Updated equilibrium dictionary with simulated choices
+        Updated equilibrium with the simulated choice index vector
+
+    Raises:
+        ValueError: If equilibrium.beta_covariance is set
+    """
+    _require_fixed_coefficient(
+        equilibrium=equilibrium,
+        function="simulate_structural_choice"
+    )
+    covariate = equilibrium.covariate
+    beta = equilibrium.beta
+    choice = equilibrium.choice
+    num_simulation = choice.shape[0]
+    num_alternative = covariate.shape[-2]
+    
+    individual = covariate.ndim == 3
+    if not individual:
+        shared_utility = equilibrium.utility[:, 0]
+    
+    # Shock and utility
+    chunk_size = min(
+        chunk_size,
+        _get_chunk_size(
+            row_nbytes=2 * num_alternative * np.dtype(np.float64).itemsize,
+            memory_budget=memory_budget
+        )
+    )
+    stored_utility = None
+    if return_utility:
+        stored_utility = np.empty((num_simulation, num_alternative))
+        equilibrium.realized_utility = stored_utility
+    stored_max_utility = None
+    if return_max_utility:
+        stored_max_utility = np.empty(num_simulation)
+        equilibrium.max_utility = stored_max_utility
+    
+    for start, stop, (generator,) in _iterate_stream(
+        seed=seed,
+        num_simulation=num_simulation,
+        chunk_size=chunk_size
+    ):
+        with stage("draw_shock"):
+            realized_utility = generator.gumbel(size=(stop - start, num_alternative))
+        if individual:
+            realized_utility += compute_utility(
+                covariate=covariate[start:stop],
+                beta=beta
+            )[..., 0]
+        else:
+            realized_utility += shared_utility
+        
+        choice_chunk = np.argmax(realized_utility, axis=1)
+        choice[start:stop] = choice_chunk
+        if stored_utility is not None:
+            stored_utility[start:stop] = realized_utility
+        if stored_max_utility is not None:
+            stored_max_utility[start:stop] = realized_utility[
+                np.arange(stop - start), choice_chunk
+            ]
+    
+    if isinstance(choice, np.memmap):
+        choice.flush()
+    
+    return equilibrium
+
+
+def _iterate_stream(
+    seed: int,
+    num_simulation: int,
+    chunk_size: int,
+    num_stream: int = 1
+) -> Iterator[Tuple[int, int, Tuple[np.random.Generator, ...]]]:
+    """
+    Walk the spawned block streams chunk by chunk.
+    
+    Each block's SeedSequence child is spawned again into num_stream
+    streams. Quantities of different shapes, such as taste draws and
+    uniforms, can then be drawn without their order depending on the
+    chunk size.
+    
+    Args:
+        seed: Random seed for reproducibility
+        num_simulation: Number of simulations
+        chunk_size: Maximum number of simulations per chunk
+        num_stream: Number of independent generators per block
+        
+    Yields:
+        Tuples of chunk start, chunk stop and the generators of the block
+        containing the chunk, each to be drawn from sequentially
     """
-    np.random.seed(seed)
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
     
-    choice_probability = compute_choice_probability(
-        covariate=equilibrium["covariate"],
-        beta=equilibrium["beta"]
+    block_start = range(0, num_simulation, STREAM_BLOCK_SIZE)
+    seed_sequence = np.random.SeedSequence(seed).spawn(len(block_start))
+    for block, block_start_row in enumerate(block_start):
+        generator = tuple(
+            np.random.default_rng(stream)
+            for stream in seed_sequence[block].spawn(num_stream)
+        )
+        block_stop_row = min(block_start_row + STREAM_BLOCK_SIZE, num_simulation)
+        for start in range(block_start_row, block_stop_row, chunk_size):
+            yield start, min(start + chunk_size, block_stop_row), generator
+
+
+def _iterate_block(
+    block_argument: Dict[str, Any]
+) -> Iterator[np.ndarray]:
+    """
+    Simulate choices for a block of simulations, or a task within one.
+    
+    The block's generator is advanced by offset draws first. Each uniform
+    takes one step of the PCG64 stream, so a task starting offset rows
+    into its block continues the block's stream exactly.
+    
+    Args:
+        block_argument: Dictionary with the block's seed_sequence, the
+            offset and num_row of the rows to simulate within the block,
+            their covariate, beta, cumulative_probability and alias_table
+            (both None for individual covariates), probability_function,
+            chunk_size and dtype
+        
+    Yields:
+        Consecutive chunks of chosen alternative indices for the rows
+    """
+    bit_generator = np.random.PCG64(block_argument["seed_sequence"])
+    bit_generator.advance(block_argument["offset"])
+    generator = np.random.Generator(bit_generator)
+    num_row = block_argument["num_row"]
+    chunk_size = block_argument["chunk_size"]
+    individual = (
+        block_argument["cumulative_probability"] is None
+        and block_argument["alias_table"] is None
     )
     
-    num_simulation = equilibrium["choice"].shape[0]
-    choice_matrix = np.zeros_like(equilibrium["choice"])
+    for start in range(0, num_row, chunk_size):
+        stop = min(start + chunk_size, num_row)
+        with stage("draw_uniform"):
+            uniform = generator.random(stop - start)
+        yield _sample_chunk(
+            covariate=(
+                block_argument["covariate"][start:stop]
+                if individual
+                else block_argument["covariate"]
+            ),
+            beta=block_argument["beta"],
+            cumulative_probability=block_argument["cumulative_probability"],
+            alias_table=block_argument["alias_table"],
+            uniform=uniform,
+            probability_function=block_argument["probability_function"]
+        ).astype(block_argument["dtype"])
+
+
+def _simulate_block(
+    block_argument: Dict[str, Any]
+) -> np.ndarray:
+    """
+    Simulate all choices of one task; the unit of work for pool workers.
+    
+    Args:
+        block_argument: Dictionary of block arguments as for _iterate_block
+        
+    Returns:
+        Vector of chosen alternative indices for the block
+    """
+    return np.concatenate(list(_iterate_block(block_argument=block_argument)))
+
+
+def _map_in_order(
+    executor: ProcessPoolExecutor,
+    function: Callable[[Any], Any],
+    iterable: Iterable[Any],
+    max_pending: int
+) -> Iterator[Any]:
+    """
+    Map a function over an iterable in a pool, keeping a bounded backlog.
+    
+    Unlike executor.map, items are submitted lazily, so at most max_pending
+    arguments and results are held at any time.
+    
+    Args:
+        executor: Process pool to submit work to
+        function: Picklable function applied to each item
+        iterable: Arguments, one per call
+        max_pending: Maximum number of submitted but unconsumed calls
+        
+    Yields:
+        Results in the order of the iterable
+    """
+    pending: Deque[Future[Any]] = deque()
+    for item in iterable:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+@instrument(name="sample_choice")
+def _sample_chunk(
+    covariate: np.ndarray,
+    beta: np.ndarray,
+    cumulative_probability: Optional[np.ndarray],
+    alias_table: Optional[Dict[str, np.ndarray]],
+    uniform: np.ndarray,
+    probability_function: Optional[Callable[..., np.ndarray]] = None
+) -> np.ndarray:
+    """
+    Sample choices for one chunk of simulations.
+
+    With individual covariates and the numba backend, utilities,
+    probabilities and draws are fused into one kernel pass per individual.
+    
+    Args:
+        covariate: Chunk of individual covariates, used when both
+            cumulative_probability and alias_table are None
+        beta: Vector of coefficients
+        cumulative_probability: Shared cumulative probability vector, or
+            None to compute it from the chunk's individual covariates
+        alias_table: Shared alias table from make_alias_table, used instead
+            of cumulative_probability when given
+        uniform: Uniform draws, one per simulation in the chunk
+        probability_function: Function of covariate and beta returning
+            choice probabilities, or None for the multinomial logit
+        
+    Returns:
+        Vector of chosen alternative indices
+    """
+    if alias_table is not None:
+        return _sample_alias(alias_table=alias_table, uniform=uniform)
+    if (
+        cumulative_probability is None
+        and probability_function is None
+        and backend.get_backend() == "numba"
+    ):
+        return backend.sample_individual_choice(
+            covariate=covariate,
+            beta=beta,
+            uniform=uniform
+        )
+    if cumulative_probability is None:
+        cumulative_probability = compute_cumulative_probability(
+            covariate=covariate,
+            beta=beta,
+            probability_function=probability_function
+        )
+    return _sample_choice(
+        cumulative_probability=cumulative_probability,
+        uniform=uniform
+    )
+
+
+def compute_cumulative_probability(
+    covariate: np.ndarray,
+    beta: np.ndarray,
+    probability_function: Optional[Callable[..., np.ndarray]] = None
+) -> np.ndarray:
+    """
+    Compute normalized cumulative choice probabilities.
+    
+    The cumulative sum is divided by its last element the same way
+    np.random.choice does, so it ends at exactly one.
+    
+    Args:
+        covariate: Matrix of covariates, or tensor of covariates by individual
+        beta: Vector of coefficients
+        probability_function: Function of covariate and beta returning
+            choice probabilities, compute_choice_probability if None
+        
+    Returns:
+        Vector of length num_alternative, or matrix of shape
+        (num_simulation, num_alternative) for individual covariates
+    """
+    if probability_function is None:
+        probability_function = compute_choice_probability
+    return _accumulate_probability(
+        choice_probability=probability_function(
+            covariate=covariate,
+            beta=beta
+        )[..., 0]
+    )
+
+
+def _accumulate_probability(
+    choice_probability: np.ndarray
+) -> np.ndarray:
+    """
+    Cumulate choice probabilities over alternatives, ending at exactly one.
+    
+    The sum runs in float64 whatever the dtype of choice_probability, so
+    rounding does not build up over many float32 alternatives.
+    
+    Args:
+        choice_probability: Choice probabilities with alternatives on the
+            last axis
+        
+    Returns:
+        Normalized cumulative probabilities of the same shape
+    """
+    cumulative_probability = np.cumsum(choice_probability, axis=-1, dtype=np.float64)
+    cumulative_probability /= cumulative_probability[..., -1:]
+    return cumulative_probability
+
+
+@instrument()
+def make_alias_table(
+    choice_probability: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Build a Walker/Vose alias table for O(1) sampling.
+    
+    Alternative j keeps column j with probability threshold[j] and otherwise
+    hands it to alias[j]. Columns are filled in batched rounds: all
+    under-full alternatives are paired at once with the over-full
+    alternatives whose cumulative surplus covers their cumulative deficit.
+    A donor that drops below one joins the next round. This is the Vose
+    construction without a Python loop over alternatives.
     
-    # For each simulation, draw from multinomial distribution
-    for i in range(num_simulation):
-        choice_idx = np.random.choice(
-            len(choice_probability), 
-            p=choice_probability.flatten()
+    Args:
+        choice_probability: Vector of choice probabilities
+        
+    Returns:
+        Dictionary with threshold and alias vectors of length num_alternative
+    """
+    probability = np.asarray(choice_probability, dtype=np.float64).ravel()
+    num_alternative = probability.shape[0]
+    
+    # Scale so that a full column has mass one
+    weight = probability * (num_alternative / probability.sum())
+    threshold = np.ones(num_alternative)
+    alias = np.arange(num_alternative)
+    
+    small = np.flatnonzero(weight < 1)
+    large = np.flatnonzero(weight >= 1)
+    while small.size and large.size:
+        deficit = 1 - weight[small]
+        deficit_start = np.cumsum(deficit) - deficit
+        surplus_end = np.cumsum(weight[large] - 1)
+        donor = np.minimum(
+            np.searchsorted(surplus_end, deficit_start, side="right"),
+            large.size - 1
         )
-        choice_matrix[i, choice_idx] = 1
+        threshold[small] = weight[small]
+        alias[small] = large[donor]
+        weight[large] -= np.bincount(donor, weights=deficit, minlength=large.size)
+        small = large[weight[large] < 1]
+        large = large[weight[large] >= 1]
+    
+    alias_table = {
+        "threshold": threshold,
+        "alias": alias
+    }
+    
+    return alias_table
+
+
+def _sample_alias(
+    alias_table: Dict[str, np.ndarray],
+    uniform: np.ndarray
+) -> np.ndarray:
+    """
+    Map uniform draws to alternatives through an alias table.
+    
+    The integer part of uniform * num_alternative picks a column and the
+    fractional part decides between the column and its alias.
+    
+    Args:
+        alias_table: Alias table from make_alias_table
+        uniform: Uniform draws on [0, 1)
+        
+    Returns:
+        Vector of chosen alternative indices
+    """
+    num_alternative = alias_table["threshold"].shape[0]
+    scaled = uniform * num_alternative
+    column = np.minimum(scaled.astype(np.intp), num_alternative - 1)
+    return np.where(
+        scaled - column < alias_table["threshold"][column],
+        column,
+        alias_table["alias"][column]
+    )
+
+
+def _sample_choice(
+    cumulative_probability: np.ndarray,
+    uniform: np.ndarray
+) -> np.ndarray:
+    """
+    Map uniform draws to alternatives by inverse-CDF search.
+    
+    Args:
+        cumulative_probability: Shared cumulative probability vector, or one
+            row per uniform draw
+        uniform: Uniform draws on [0, 1)
+        
+    Returns:
+        Index of the first alternative whose cumulative probability exceeds
+        each uniform draw
+    """
+    if cumulative_probability.ndim == 1:
+        return np.searchsorted(cumulative_probability, uniform, side="right")
     
-    # Update equilibrium with simulated choices
-    equilibrium["choice"] = choice_matrix
+    # Count, row by row, the cumulative probabilities at or below the draw
+    choice_idx = np.count_nonzero(
+        cumulative_probability <= uniform[:, np.newaxis],
+        axis=1
+    )
+    choice: np.ndarray = np.minimum(choice_idx, cumulative_probability.shape[1] - 1)
+    return choice
+
+
+def _require_fixed_coefficient(
+    equilibrium: Equilibrium,
+    function: str
+) -> None:
+    """
+    Reject a random-coefficients equilibrium on a fixed-coefficient path.
     
-    return equilibrium 
\ No newline at end of file
+    Args:
+        equilibrium: Equilibrium to check
+        function: Name of the caller, for the error message
+        
+    Raises:
+        ValueError: If equilibrium.beta_covariance is set
+    """
+    if equilibrium.beta_covariance is not None:
+        raise ValueError(
+            f"{function} assumes fixed coefficients but beta_covariance "
+            "is set; use economics.mixed_logit"
+        )
+
+
+def _get_chunk_size(
+    row_nbytes: int,
+    memory_budget: int
+) -> int:
+    """
+    Get the number of rows whose temporaries fit within a memory budget.
+    
+    Args:
+        row_nbytes: Bytes of temporaries needed per row
+        memory_budget: Maximum bytes of temporaries per chunk
+        
+    Returns:
+        Number of rows per chunk, at least one
+    """
+    return max(1, memory_budget // max(1, row_nbytes))
+
+
+def run_grid(
+    config: Dict[str, Any],
+    num_worker: Optional[int] = 1
+) -> List[Dict[str, Any]]:
+    """
+    Simulate choices at every point of a parameter grid in one process.
+
+    config["parameter"] holds values shared by all points and config["grid"]
+    lists the values to sweep. Points are all combinations of the grid
+    values, and each is simulated by simulate_parameter. With
+    config["output_path"], each point is saved with
+    economics.storage.save_equilibrium to a subdirectory named after its
+    grid values. With config["cache_path"], points are looked up in and
+    added to that economics.cache directory instead of always simulated.
+
+    Args:
+        config: Dictionary with parameter, grid and optionally output_path
+            and cache_path
+        num_worker: Number of worker processes running grid points in
+            parallel. None uses all CPUs; 1 runs in the current process.
+
+    Returns:
+        One dictionary per point with its parameters, output path and
+        wall time, in grid order
+    """
+    if num_worker is None:
+        num_worker = os.cpu_count() or 1
+    grid = config.get("grid", {})
+    point_argument = (
+        {
+            "parameter": {**config.get("parameter", {}), **dict(zip(grid, value))},
+            "output_path": (
+                os.path.join(
+                    config["output_path"],
+                    "_".join(f"{name}_{v}" for name, v in zip(grid, value)) or "point"
+                )
+                if config.get("output_path")
+                else None
+            ),
+            "cache_path": config.get("cache_path")
+        }
+        for value in itertools.product(*grid.values())
+    )
+
+    if num_worker == 1:
+        return list(map(_run_grid_point, point_argument))
+    with ProcessPoolExecutor(
+        max_workers=num_worker,
+        mp_context=multiprocessing.get_context(WORKER_START_METHOD)
+    ) as executor:
+        return list(_map_in_order(
+            executor=executor,
+            function=_run_grid_point,
+            iterable=point_argument,
+            max_pending=2 * num_worker
+        ))
+
+
+def simulate_parameter(
+    parameter: Dict[str, Any]
+) -> Equilibrium:
+    """
+    Make an equilibrium and simulate its choices from one parameter set.
+
+    Args:
+        parameter: covariate_seed (seed of np.random.seed before
+            make_equilibrium, default 1), seed (seed of simulate_choice,
+            default 10) and keyword arguments of make_equilibrium
+
+    Returns:
+        Equilibrium with simulated choices
+    """
+    parameter = dict(parameter)
+    covariate_seed = parameter.pop("covariate_seed", 1)
+    seed = parameter.pop("seed", 10)
+
+    np.random.seed(covariate_seed)
+    equilibrium = make_equilibrium(**parameter)
+    equilibrium = simulate_choice(seed=seed, equilibrium=equilibrium)
+
+    return equilibrium
+
+
+def _run_grid_point(
+    point_argument: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Simulate and optionally save one grid point.
+
+    Args:
+        point_argument: Dictionary with the point's parameter dictionary,
+            output_path (None to skip saving) and cache_path (None to
+            always simulate)
+
+    Returns:
+        Dictionary with the point's parameters, output path and wall time
+    """
+    # Imported here because economics.storage imports this module
+    from .storage import save_equilibrium
+
+    start = time.perf_counter()
+    if point_argument["cache_path"] is None:
+        equilibrium = simulate_parameter(parameter=point_argument["parameter"])
+    else:
+        from .cache import load_or_simulate
+        equilibrium = load_or_simulate(
+            parameter=point_argument["parameter"],
+            cache_path=point_argument["cache_path"]
+        )
+    if point_argument["output_path"] is not None:
+        save_equilibrium(
+            equilibrium=equilibrium,
+            path=point_argument["output_path"],
+            config=point_argument["parameter"]
+        )
+
+    result = {
+        **point_argument["parameter"],
+        "output_path": point_argument["output_path"],
+        "wall_time": time.perf_counter() - start
+    }
+
+    return result
+
+
+if __name__ == "__main__":
+    # Slow path: NumPy and this module are already loaded. economics.cli
+    # imports them only once the arguments are parsed.
+    from .cli import main
+    sys.exit(main(prog="python -m economics.simulate"))
@@ -0,0 +1,122 @@
+import json
+import os
+import numpy as np
+from typing import Any, Dict, Literal, Optional, TypeGuard
+
+from .instrument import instrument
+from .simulate import Equilibrium
+
+METADATA_FILE = "metadata.json"
+
+
+@instrument()
+def save_equilibrium(
+    equilibrium: Equilibrium,
+    path: str,
+    config: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Save an equilibrium as a directory of .npy files with a JSON sidecar.
+
+    Each stored array of the equilibrium (Equilibrium.FIELD entries that
+    are set) is written uncompressed to <path>/<name>.npy so it can later
+    be memory-mapped; cached derived quantities are not saved.
+    metadata.json records the config (including seeds) and the shape and
+    dtype of every array. An array that is already a memory map of its
+    target file is only flushed, not copied.
+
+    Args:
+        equilibrium: Equilibrium to save
+        path: Output directory, created if missing
+        config: JSON-serializable run configuration, such as sizes and seeds
+    """
+    os.makedirs(path, exist_ok=True)
+
+    array_metadata = {}
+    for name, array in equilibrium.to_dict().items():
+        file = os.path.join(path, f"{name}.npy")
+        if _is_memmap_of(array=array, file=file):
+            array.flush()
+        else:
+            np.save(file=file, arr=array)
+        array_metadata[name] = {
+            "shape": list(array.shape),
+            "dtype": array.dtype.str
+        }
+
+    metadata = {
+        "config": config or {},
+        "array": array_metadata
+    }
+    with open(os.path.join(path, METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+
+@instrument()
+def load_equilibrium(
+    path: str,
+    mmap_mode: Optional[Literal["r", "r+", "w+", "c"]] = "r"
+) -> Equilibrium:
+    """
+    Load an equilibrium saved by save_equilibrium.
+
+    With the default mmap_mode="r" arrays are memory-mapped rather than
+    read, so opening a multi-GB result is instant and only the parts that
+    are accessed are paged in.
+
+    Args:
+        path: Directory written by save_equilibrium
+        mmap_mode: Memory-map mode passed to np.load, or None to read the
+            arrays into memory
+
+    Returns:
+        Equilibrium with the saved arrays
+    """
+    metadata = load_metadata(path=path)
+
+    equilibrium = Equilibrium(**{
+        name: np.load(file=os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in metadata["array"]
+    })
+
+    return equilibrium
+
+
+def load_metadata(
+    path: str
+) -> Dict[str, Any]:
+    """
+    Load the JSON metadata of a saved equilibrium.
+
+    Args:
+        path: Directory written by save_equilibrium
+
+    Returns:
+        Dictionary with the run config and the shape and dtype of each array
+    """
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata: Dict[str, Any] = json.load(f)
+
+    return metadata
+
+
+def _is_memmap_of(
+    array: np.ndarray,
+    file: str
+) -> TypeGuard[np.memmap]:
+    """
+    Check whether an array is a writable memory map of a given file.
+
+    Args:
+        array: Array to check
+        file: Path of the .npy file
+
+    Returns:
+        True if array maps file, so saving it again would be a copy onto itself
+    """
+    return (
+        isinstance(array, np.memmap)
+        and array.filename is not None
+        and os.path.exists(file)
+        and os.path.samefile(array.filename, file)
+    )
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from economics import backend
+from economics.estimate import (
+    compute_log_likelihood,
+    compute_sufficient_statistic,
+    estimate_beta,
+)
+from economics.simulate import Equilibrium, make_equilibrium, simulate_choice
+
+pytest.importorskip("numba")
+
+
+def _make_equilibrium() -> Equilibrium:
+    np.random.seed(0)
+    return make_equilibrium(
+        num_simulation=20_000,
+        num_alternative=6,
+        num_covariate=3,
+        individual_covariate=True,
+        beta=[0.5, -1.0, 2.0]
+    )
+
+
+def test_numba_draws_match_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The fused kernel draws the same choices as the NumPy path."""
+    equilibrium = _make_equilibrium()
+
+    monkeypatch.setattr(backend, "_backend", "numpy")
+    expected = simulate_choice(seed=2, equilibrium=equilibrium).choice.copy()
+    monkeypatch.setattr(backend, "_backend", "numba")
+    simulate_choice(seed=2, equilibrium=equilibrium)
+
+    np.testing.assert_array_equal(equilibrium.choice, expected)
+
+
+def test_numba_likelihood_matches_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The fused kernel agrees with the chunked NumPy likelihood."""
+    equilibrium = _make_equilibrium()
+    simulate_choice(seed=2, equilibrium=equilibrium)
+    statistic = compute_sufficient_statistic(
+        covariate=equilibrium.covariate,
+        choice=equilibrium.choice
+    )
+    beta = np.array([[0.4], [-0.8], [1.5]])
+
+    monkeypatch.setattr(backend, "_backend", "numpy")
+    expected = compute_log_likelihood(beta=beta, statistic=statistic)
+    monkeypatch.setattr(backend, "_backend", "numba")
+    result = compute_log_likelihood(beta=beta, statistic=statistic)
+
+    assert result["log_likelihood"] == pytest.approx(expected["log_likelihood"])
+    for name in ("gradient", "hessian"):
+        np.testing.assert_allclose(result[name], expected[name], rtol=1e-10)
+
+
+def test_numba_estimate_converges_like_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The fused likelihood is accurate enough for Newton steps to converge."""
+    # Enough individuals that a plain running sum of the log-likelihood
+    # drifts by more than the last Newton steps gain
+    np.random.seed(0)
+    equilibrium = make_equilibrium(
+        num_simulation=50_000,
+        num_alternative=4,
+        num_covariate=3,
+        individual_covariate=True,
+        beta=[0.5, -1.0, 0.25]
+    )
+    simulate_choice(seed=2, equilibrium=equilibrium)
+
+    monkeypatch.setattr(backend, "_backend", "numpy")
+    expected = estimate_beta(equilibrium=equilibrium)
+    monkeypatch.setattr(backend, "_backend", "numba")
+    result = estimate_beta(equilibrium=equilibrium)
+
+    assert result["converged"]
+    assert result["num_iteration"] == expected["num_iteration"]
+    np.testing.assert_allclose(result["beta"], expected["beta"], rtol=1e-9)
@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+import pytest
+
+from economics.benchmark import CLEAR_REFS_PATH, _get_peak_rss, compare_benchmark
+
+
+@pytest.mark.skipif(
+    not os.path.exists(CLEAR_REFS_PATH),
+    reason="resetting the peak resident set size needs Linux"
+)
+def test_peak_rss_sees_call_allocation() -> None:
+    """The peak covers memory allocated and freed within the call."""
+    memory = _get_peak_rss(call=lambda: np.ones(50 * 2**20 // 8).sum())
+
+    assert memory["peak_rss"] is not None and memory["peak_nbytes"] is not None
+    assert 45 * 2**20 < memory["peak_nbytes"] < 100 * 2**20
+    assert memory["peak_rss"] >= memory["peak_nbytes"]
+
+
+def test_compare_benchmark_matches_backend() -> None:
+    """Runs of different backends are never compared with each other."""
+    record = {
+        "function": "simulate_choice",
+        "num_simulation": 1000,
+        "num_alternative": 2,
+        "num_covariate": 2,
+        "individual_covariate": True,
+        "wall_time": 1.0,
+        "min_wall_time": 1.0,
+        "max_wall_time": 1.0
+    }
+    baseline = {"result": [{**record, "backend": "numpy", "numba": None}]}
+    slower = {**record, "wall_time": 2.0, "min_wall_time": 2.0, "max_wall_time": 2.0}
+
+    numba_run = {"result": [{**slower, "backend": "numba", "numba": "0.60.0"}]}
+    numpy_run = {"result": [{**slower, "backend": "numpy", "numba": None}]}
+
+    assert compare_benchmark(benchmark=numba_run, baseline=baseline) == []
+    assert len(compare_benchmark(benchmark=numpy_run, baseline=baseline)) == 1
@@ -0,0 +1,66 @@
+import numpy as np
+
+from economics.blp import compute_log_share, invert_share
+from economics.mixed_logit import compute_beta_draw, make_normal_draw
+from economics.simulate import compute_utility
+
+NUM_DRAW = 100
+
+
+def _make_deviation(covariate: np.ndarray, beta_covariance: np.ndarray) -> np.ndarray:
+    beta_draw = compute_beta_draw(
+        beta=np.zeros((covariate.shape[-1], 1)),
+        beta_covariance=beta_covariance,
+        normal_draw=make_normal_draw(
+            num_draw=NUM_DRAW,
+            num_dimension=covariate.shape[-1],
+            seed=0
+        )
+    )
+    deviation: np.ndarray = compute_utility(covariate=covariate, beta=beta_draw.T)
+    return deviation
+
+
+def test_plain_logit_inversion_is_closed_form() -> None:
+    """Without random coefficients, delta is log(s_j) - log(s_0)."""
+    mean_utility = np.array([[0.5, -1.0, 0.0], [2.0, 1.0, -3.0]])
+    exp_utility = np.exp(mean_utility)
+    share = exp_utility / (1 + exp_utility.sum(axis=1, keepdims=True))
+
+    inversion = invert_share(share=share)
+
+    np.testing.assert_allclose(inversion["mean_utility"], mean_utility, atol=1e-12)
+
+
+def test_contraction_recovers_mean_utility() -> None:
+    """Inverting predicted shares returns the mean utilities behind them."""
+    np.random.seed(0)
+    covariate = np.random.normal(size=(4, 5, 2))
+    beta_covariance = np.array([[1.0, 0.3], [0.3, 0.5]])
+    mean_utility = np.random.normal(size=(4, 5)) - 1
+    share = np.exp(compute_log_share(
+        mean_utility=mean_utility,
+        deviation=_make_deviation(covariate=covariate, beta_covariance=beta_covariance)
+    ))
+
+    inversion = invert_share(
+        share=share,
+        covariate=covariate,
+        beta_covariance=beta_covariance,
+        num_draw=NUM_DRAW,
+        seed=0
+    )
+    assert np.all(inversion["converged"])
+    np.testing.assert_allclose(inversion["mean_utility"], mean_utility, atol=1e-9)
+
+    # A warm start at the solution needs at most one cycle
+    warm = invert_share(
+        share=share,
+        covariate=covariate,
+        beta_covariance=beta_covariance,
+        mean_utility_initial=inversion["mean_utility"],
+        num_draw=NUM_DRAW,
+        seed=0
+    )
+    assert np.all(warm["num_iteration"] <= 1)
+    assert np.all(warm["num_iteration"] < inversion["num_iteration"])
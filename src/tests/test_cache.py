@@ -0,0 +1,64 @@
+import os
+import pathlib
+import shutil
+from typing import Any
+
+import numpy as np
+import pytest
+
+from economics import backend, cache
+from economics.cache import get_cache_key, load_or_simulate
+from economics.simulate import Equilibrium, simulate_parameter
+
+PARAMETER = {
+    "num_simulation": 1000,
+    "num_alternative": 4,
+    "num_covariate": 2,
+    "seed": 5
+}
+
+
+def test_hit_returns_simulated_equilibrium(tmp_path: pathlib.Path) -> None:
+    """A miss stores the simulation and a hit maps the same arrays."""
+    cache_path = os.fspath(tmp_path)
+    expected = simulate_parameter(parameter=PARAMETER)
+
+    for _ in range(2):
+        equilibrium = load_or_simulate(parameter=PARAMETER, cache_path=cache_path)
+        assert isinstance(equilibrium.choice, np.memmap)
+        np.testing.assert_array_equal(equilibrium.choice, expected.choice)
+        np.testing.assert_array_equal(equilibrium.covariate, expected.covariate)
+    assert os.listdir(cache_path) == [get_cache_key(parameter=PARAMETER)]
+
+
+def test_key_depends_on_backend(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Entries simulated with different backends are kept apart."""
+    monkeypatch.setattr(backend, "get_backend", lambda: "numpy")
+    numpy_key = get_cache_key(parameter=PARAMETER)
+    monkeypatch.setattr(backend, "get_backend", lambda: "numba")
+    assert get_cache_key(parameter=PARAMETER) != numpy_key
+
+
+def test_entry_evicted_during_hit_is_recomputed(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: pathlib.Path
+) -> None:
+    """An entry deleted between the check and the load counts as a miss."""
+    cache_path = os.fspath(tmp_path)
+    load_or_simulate(parameter=PARAMETER, cache_path=cache_path)
+    entry_path = os.path.join(cache_path, get_cache_key(parameter=PARAMETER))
+
+    load_equilibrium = cache.load_equilibrium
+
+    def evict_then_load(**argument: Any) -> Equilibrium:
+        # Another process evicts the entry once, after the isdir check
+        monkeypatch.setattr(cache, "load_equilibrium", load_equilibrium)
+        shutil.rmtree(entry_path)
+        return load_equilibrium(**argument)
+
+    monkeypatch.setattr(cache, "load_equilibrium", evict_then_load)
+    equilibrium = load_or_simulate(parameter=PARAMETER, cache_path=cache_path)
+
+    expected = simulate_parameter(parameter=PARAMETER)
+    np.testing.assert_array_equal(equilibrium.choice, expected.choice)
+    assert os.path.isdir(entry_path)
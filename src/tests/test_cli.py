@@ -0,0 +1,53 @@
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+import economics
+from economics import cli
+
+
+def test_help_does_not_import_numpy() -> None:
+    """--help returns before NumPy or the simulation modules load."""
+    code = (
+        "import sys\n"
+        "from economics import cli\n"
+        "try:\n"
+        "    cli.main(argument=['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted({'numpy', 'economics.simulate'} & set(sys.modules)))\n"
+    )
+    package_path = os.path.dirname(os.path.dirname(economics.__file__))
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, "PYTHONPATH": package_path},
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+
+    assert output.splitlines()[-1] == "[]"
+
+
+def test_main_runs_grid_and_names_its_command(
+    capsys: pytest.CaptureFixture[str],
+    tmp_path: pathlib.Path
+) -> None:
+    """The grid runs from a config, and usage shows the invoked command."""
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({
+        "parameter": {"num_simulation": 100, "num_alternative": 3, "num_covariate": 2},
+        "grid": {"seed": [1, 2]}
+    }))
+
+    assert cli.main(argument=[str(config_path)]) == 0
+    result = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [point["seed"] for point in result] == [1, 2]
+
+    with pytest.raises(SystemExit):
+        cli.main(argument=["--help"], prog="python -m economics.simulate")
+    assert capsys.readouterr().out.startswith("usage: python -m economics.simulate")
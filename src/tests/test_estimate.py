@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from economics import backend
+from economics.estimate import (
+    compute_log_likelihood,
+    compute_sufficient_statistic,
+    estimate_beta,
+)
+from economics.simulate import Equilibrium, make_equilibrium, simulate_choice
+
+BETA = [0.5, -1.0, 0.25]
+
+
+def _simulate_equilibrium(discrete: bool = False) -> Equilibrium:
+    np.random.seed(0)
+    equilibrium = make_equilibrium(
+        num_simulation=50_000,
+        num_alternative=4,
+        num_covariate=3,
+        individual_covariate=True,
+        beta=BETA
+    )
+    if discrete:
+        # Few distinct covariate values, so that patterns repeat
+        equilibrium.covariate = np.round(equilibrium.covariate)
+    return simulate_choice(seed=2, equilibrium=equilibrium)
+
+
+def test_estimate_recovers_beta() -> None:
+    """Maximum likelihood on simulated choices recovers the true beta."""
+    result = estimate_beta(equilibrium=_simulate_equilibrium())
+
+    assert result["converged"] and result["identified"]
+    assert np.all(np.isfinite(result["standard_error"]))
+    np.testing.assert_array_less(
+        np.abs(result["beta"].ravel() - BETA),
+        4 * result["standard_error"].ravel()
+    )
+
+
+def test_gradient_and_hessian_match_finite_differences(
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The analytic gradient and Hessian are derivatives of the likelihood."""
+    monkeypatch.setattr(backend, "_backend", "numpy")
+    equilibrium = _simulate_equilibrium()
+    statistic = compute_sufficient_statistic(
+        covariate=equilibrium.covariate[:2000],
+        choice=equilibrium.choice[:2000]
+    )
+    beta = np.array([[0.3], [-0.7], [0.1]])
+    likelihood = compute_log_likelihood(beta=beta, statistic=statistic)
+
+    step = 1e-5
+    gradient = np.empty(3)
+    hessian = np.empty((3, 3))
+    for k in range(3):
+        shift = np.zeros((3, 1))
+        shift[k] = step
+        upper = compute_log_likelihood(beta=beta + shift, statistic=statistic)
+        lower = compute_log_likelihood(beta=beta - shift, statistic=statistic)
+        gradient[k] = (upper["log_likelihood"] - lower["log_likelihood"]) / (2 * step)
+        hessian[:, k] = (upper["gradient"] - lower["gradient"]).ravel() / (2 * step)
+
+    np.testing.assert_allclose(likelihood["gradient"].ravel(), gradient, rtol=1e-6)
+    np.testing.assert_allclose(likelihood["hessian"], hessian, rtol=1e-6)
+
+
+def test_aggregate_pattern_gives_same_estimate() -> None:
+    """Merging identical covariate patterns does not change the estimate."""
+    equilibrium = _simulate_equilibrium(discrete=True)
+
+    result = estimate_beta(equilibrium=equilibrium)
+    aggregated = estimate_beta(equilibrium=equilibrium, aggregate_pattern=True)
+
+    statistic = compute_sufficient_statistic(
+        covariate=equilibrium.covariate,
+        choice=equilibrium.choice,
+        aggregate_pattern=True
+    )
+    assert statistic["covariate"].shape[0] < equilibrium.num_simulation
+    for name in ("beta", "standard_error", "log_likelihood"):
+        np.testing.assert_allclose(aggregated[name], result[name], rtol=1e-9)
+
+
+def test_unidentified_beta_is_not_reported_as_converged() -> None:
+    """Shared covariates cannot identify more coefficients than J - 1."""
+    np.random.seed(0)
+    equilibrium = make_equilibrium(
+        num_simulation=10_000,
+        num_alternative=2,
+        num_covariate=3
+    )
+    simulate_choice(seed=1, equilibrium=equilibrium)
+
+    result = estimate_beta(equilibrium=equilibrium)
+
+    assert not result["identified"]
+    assert not result["converged"]
+    assert np.all(np.isnan(result["standard_error"]))
@@ -0,0 +1,63 @@
+import numpy as np
+
+from economics.nested_logit import compute_nested_choice_probability
+from economics.simulate import compute_choice_probability
+
+NEST = np.array([1, 0, 1, 2, 0])
+DISSIMILARITY = np.array([0.5, 0.8, 1.0])
+
+
+def _compute_textbook_probability(utility: np.ndarray) -> np.ndarray:
+    # P_j = exp(V_j / lambda_g) / exp(I_g) * exp(lambda_g I_g) / sum_h exp(lambda_h I_h)
+    inclusive_value = np.array([
+        np.log(np.sum(np.exp(utility[NEST == g] / DISSIMILARITY[g])))
+        for g in range(len(DISSIMILARITY))
+    ])
+    nest_probability = np.exp(DISSIMILARITY * inclusive_value)
+    nest_probability /= nest_probability.sum()
+    probability: np.ndarray = (
+        np.exp(utility / DISSIMILARITY[NEST] - inclusive_value[NEST])
+        * nest_probability[NEST]
+    )
+    return probability
+
+
+def test_matches_textbook_formula() -> None:
+    """Segment-wise log-sum-exps give the textbook nested logit."""
+    np.random.seed(0)
+    covariate = np.random.normal(size=(5, 2))
+    beta = np.array([[1.0], [-0.5]])
+
+    choice_probability = compute_nested_choice_probability(
+        covariate=covariate,
+        beta=beta,
+        nest=NEST,
+        dissimilarity=DISSIMILARITY
+    )
+
+    expected = _compute_textbook_probability(utility=(covariate @ beta)[:, 0])
+    np.testing.assert_allclose(choice_probability[:, 0], expected)
+
+
+def test_unit_dissimilarity_is_logit() -> None:
+    """Dissimilarity one in every nest reduces to the multinomial logit."""
+    np.random.seed(0)
+    covariate = np.random.normal(size=(3, 5, 2))
+    beta = np.array([[1.0], [-0.5]])
+    available = np.random.uniform(size=(3, 5)) < 0.7
+
+    np.testing.assert_allclose(
+        compute_nested_choice_probability(
+            covariate=covariate,
+            beta=beta,
+            nest=NEST,
+            dissimilarity=np.ones(3),
+            available=available
+        ),
+        compute_choice_probability(
+            covariate=covariate,
+            beta=beta,
+            available=available
+        ),
+        atol=1e-15
+    )
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from typing import Any, Dict
+
+from economics.pricing import solve_price_equilibrium
+
+PRICE_COEFFICIENT = -2.0
+
+# Firm A owns products 0 and 1, firm B owns product 2, firm C product 3
+OWNERSHIP = np.array([
+    [1, 1, 0, 0],
+    [1, 1, 0, 0],
+    [0, 0, 1, 0],
+    [0, 0, 0, 1]
+])
+
+
+def _compute_first_order_condition(
+    equilibrium: Dict[str, Any],
+    ownership: np.ndarray
+) -> np.ndarray:
+    # d profit_f / d p_j = s_j + sum_{k owned with j} markup_k ds_k/dp_j
+    share = equilibrium["share"]
+    markup = equilibrium["markup"]
+    jacobian = PRICE_COEFFICIENT * (
+        np.einsum("mk,kj->mkj", share, np.eye(share.shape[1]))
+        - np.einsum("mk,mj->mkj", share, share)
+    )
+    condition: np.ndarray = share + np.einsum(
+        "mk,mkj,mkj->mj",
+        markup,
+        jacobian,
+        np.broadcast_to(ownership, jacobian.shape)
+    )
+    return condition
+
+
+@pytest.mark.parametrize("acceleration", ["squarem", "none"])
+def test_prices_satisfy_first_order_conditions(acceleration: str) -> None:
+    """Solved prices zero every firm's first-order conditions."""
+    np.random.seed(0)
+    covariate = np.random.normal(size=(3, 4, 2))
+    marginal_cost = np.random.uniform(0.5, 1.5, size=(3, 4))
+
+    equilibrium = solve_price_equilibrium(
+        covariate=covariate,
+        beta=np.array([[1.0], [0.5]]),
+        price_coefficient=PRICE_COEFFICIENT,
+        marginal_cost=marginal_cost,
+        ownership=OWNERSHIP,
+        acceleration=acceleration
+    )
+
+    assert np.all(equilibrium["converged"])
+    np.testing.assert_allclose(
+        equilibrium["price"],
+        marginal_cost + equilibrium["markup"]
+    )
+    np.testing.assert_allclose(
+        _compute_first_order_condition(equilibrium=equilibrium, ownership=OWNERSHIP),
+        0,
+        atol=1e-10
+    )
+
+
+def test_merger_raises_prices() -> None:
+    """Joint ownership of every product raises all prices."""
+    np.random.seed(0)
+    argument: Dict[str, Any] = {
+        "covariate": np.random.normal(size=(4, 2)),
+        "beta": np.array([[1.0], [0.5]]),
+        "price_coefficient": PRICE_COEFFICIENT,
+        "marginal_cost": np.ones(4)
+    }
+
+    separate = solve_price_equilibrium(ownership=np.eye(4), **argument)
+    merged = solve_price_equilibrium(ownership=np.ones((4, 4)), **argument)
+
+    assert np.all(merged["price"] > separate["price"])
+    np.testing.assert_allclose(
+        _compute_first_order_condition(equilibrium=merged, ownership=np.ones((4, 4))),
+        0,
+        atol=1e-10
+    )
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from economics import simulate
+from economics.share import simulate_share
+from economics.simulate import make_equilibrium, simulate_choice
+
+
+@pytest.mark.parametrize(
+    "num_alternative, individual_covariate",
+    [(5, False), (50, False), (5, True)]
+)
+def test_share_counts_match_simulate_choice(
+    monkeypatch: pytest.MonkeyPatch,
+    num_alternative: int,
+    individual_covariate: bool
+) -> None:
+    """simulate_share counts the choices simulate_choice draws."""
+    # Small enough that the 50 alternatives are drawn from an alias table
+    monkeypatch.setattr(simulate, "ALIAS_THRESHOLD", 20)
+    np.random.seed(0)
+    equilibrium = make_equilibrium(
+        num_simulation=20_000,
+        num_alternative=num_alternative,
+        num_covariate=2,
+        individual_covariate=individual_covariate
+    )
+    result = simulate_share(seed=4, equilibrium=equilibrium)
+    simulate_choice(seed=4, equilibrium=equilibrium)
+
+    np.testing.assert_array_equal(
+        result["count"],
+        np.bincount(equilibrium.choice, minlength=num_alternative)
+    )
+    assert result["p_value"] > 1e-4
@@ -0,0 +1,83 @@
+import pickle
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+import pytest
+
+from economics.shared import (
+    SharedArray,
+    release_array,
+    share_array,
+    shared_equilibrium,
+)
+from economics import simulate
+from economics.simulate import make_equilibrium, simulate_choice
+
+
+def test_views_pickle_by_offset_and_results_by_value() -> None:
+    """Views map the segment; ufunc results are copied like plain arrays."""
+    shared = share_array(array=np.arange(12.0).reshape(4, 3))
+    view = shared[1:3]
+    result = shared[1:3] * 2
+
+    assert shared.segment is not None
+    assert isinstance(view, SharedArray) and view.segment is shared.segment
+    assert getattr(result, "segment", None) is None
+    assert view.__reduce__()[1][:2] == (shared.segment.name, 3 * 8)
+    np.testing.assert_array_equal(pickle.loads(pickle.dumps(view)), view)
+    np.testing.assert_array_equal(pickle.loads(pickle.dumps(result)), result)
+    release_array(array=shared)
+
+
+def test_derived_beta_reaches_workers() -> None:
+    """An array computed from shared arrays is sent to workers intact."""
+    np.random.seed(0)
+    equilibrium = make_equilibrium(
+        num_simulation=50_000,
+        num_alternative=4,
+        num_covariate=2,
+        individual_covariate=True,
+        beta=[2.0, 2.0]
+    )
+    expected = simulate_choice(seed=1, equilibrium=equilibrium).choice.copy()
+    equilibrium.beta = equilibrium.beta / 2
+
+    with shared_equilibrium(equilibrium=equilibrium) as shared:
+        shared.beta = shared.beta * 2
+        simulate_choice(seed=1, equilibrium=shared, num_worker=2)
+        np.testing.assert_array_equal(shared.choice, expected)
+
+
+def test_derived_covariate_is_shared_not_pickled(
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Covariates computed from shared ones are shared again, not copied."""
+    np.random.seed(0)
+    equilibrium = make_equilibrium(
+        num_simulation=20_000,
+        num_alternative=4,
+        num_covariate=2,
+        individual_covariate=True
+    )
+    expected = simulate_choice(seed=1, equilibrium=equilibrium).choice.copy()
+
+    # Record the pickled size of every task sent to the workers
+    argument_nbytes = []
+    map_in_order = simulate._map_in_order
+
+    def record_map_in_order(iterable: Iterable[Any], **argument: Any) -> Iterator[Any]:
+        def record(iterable: Iterable[Any]) -> Iterator[Any]:
+            for item in iterable:
+                argument_nbytes.append(len(pickle.dumps(item)))
+                yield item
+        return map_in_order(iterable=record(iterable), **argument)
+
+    monkeypatch.setattr(simulate, "_map_in_order", record_map_in_order)
+    with shared_equilibrium(equilibrium=equilibrium) as shared:
+        shared.covariate = shared.covariate * 1.0
+        assert isinstance(shared.covariate, SharedArray)
+        simulate_choice(seed=1, equilibrium=shared, num_worker=2)
+        np.testing.assert_array_equal(shared.choice, expected)
+
+    assert argument_nbytes
+    assert max(argument_nbytes) < equilibrium.covariate.nbytes / 100
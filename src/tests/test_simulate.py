@@ -0,0 +1,232 @@
+import numpy as np
+import pytest
+
+from economics import simulate
+from economics.mixed_logit import simulate_mixed_choice
+from economics.simulate import (
+    compute_choice_probability,
+    iterate_choice,
+    make_alias_table,
+    make_equilibrium,
+    simulate_choice,
+    simulate_structural_choice,
+    summarize_choice_probability,
+)
+
+
+def _make_equilibrium(
+    num_simulation: int,
+    individual_covariate: bool
+) -> simulate.Equilibrium:
+    np.random.seed(0)
+    return make_equilibrium(
+        num_simulation=num_simulation,
+        num_alternative=5,
+        num_covariate=2,
+        individual_covariate=individual_covariate
+    )
+
+
+def test_legacy_random_reproduces_choice_loop() -> None:
+    """legacy_random draws what the former np.random.choice loop drew."""
+    equilibrium = _make_equilibrium(num_simulation=2000, individual_covariate=False)
+    utility = equilibrium.covariate @ equilibrium.beta
+    choice_probability = np.exp(utility) / np.sum(np.exp(utility))
+
+    np.random.seed(10)
+    expected = [
+        np.random.choice(len(choice_probability), p=choice_probability.flatten())
+        for _ in range(equilibrium.num_simulation)
+    ]
+    simulate_choice(seed=10, equilibrium=equilibrium, legacy_random=True, chunk_size=7)
+
+    np.testing.assert_array_equal(equilibrium.choice, expected)
+
+
+@pytest.mark.parametrize("individual_covariate", [False, True])
+def test_choice_invariant_to_num_worker_and_chunk_size(
+    monkeypatch: pytest.MonkeyPatch,
+    individual_covariate: bool
+) -> None:
+    """Workers, tasks and chunks change who draws a row, not what is drawn."""
+    # Small blocks and tasks, so that tasks start inside and across blocks
+    monkeypatch.setattr(simulate, "STREAM_BLOCK_SIZE", 2**12)
+    monkeypatch.setattr(simulate, "MIN_TASK_SIZE", 2**10)
+    equilibrium = _make_equilibrium(
+        num_simulation=10_000,
+        individual_covariate=individual_covariate
+    )
+    expected = simulate_choice(seed=3, equilibrium=equilibrium).choice.copy()
+
+    for num_worker, chunk_size in ((1, 333), (2, 1_000_000), (3, 500)):
+        equilibrium.choice.fill(-1)
+        simulate_choice(
+            seed=3,
+            equilibrium=equilibrium,
+            num_worker=num_worker,
+            chunk_size=chunk_size
+        )
+        np.testing.assert_array_equal(equilibrium.choice, expected)
+
+
+def test_choice_frequency_matches_probability() -> None:
+    """Simulated shares agree with the logit probabilities."""
+    equilibrium = _make_equilibrium(num_simulation=200_000, individual_covariate=False)
+    simulate_choice(seed=1, equilibrium=equilibrium)
+
+    share = np.bincount(equilibrium.choice, minlength=5) / equilibrium.num_simulation
+    np.testing.assert_allclose(
+        share,
+        equilibrium.choice_probability[:, 0],
+        atol=5e-3
+    )
+
+
+def test_choice_probability_does_not_overflow() -> None:
+    """Log-sum-exp normalization keeps huge utilities finite."""
+    covariate = np.array([[1000.0], [1001.0], [-1000.0]])
+    choice_probability = compute_choice_probability(
+        covariate=covariate,
+        beta=np.ones((1, 1))
+    )[:, 0]
+
+    expected = np.exp([-1.0, 0.0, -2001.0]) / (1 + np.exp(-1.0))
+    np.testing.assert_allclose(choice_probability, expected)
+
+
+def test_random_coefficients_are_not_simulated_at_the_mean() -> None:
+    """Random coefficients run the mixed logit or are refused."""
+    np.random.seed(0)
+    equilibrium = make_equilibrium(
+        num_simulation=1000,
+        num_alternative=4,
+        num_covariate=2,
+        beta_covariance=np.eye(2)
+    )
+    choice = simulate_choice(seed=1, equilibrium=equilibrium).choice.copy()
+    simulate_mixed_choice(seed=1, equilibrium=equilibrium)
+    np.testing.assert_array_equal(choice, equilibrium.choice)
+
+    with pytest.raises(ValueError):
+        equilibrium.choice_probability
+    with pytest.raises(ValueError):
+        next(iterate_choice(seed=1, equilibrium=equilibrium))
+    with pytest.raises(ValueError):
+        simulate_structural_choice(seed=1, equilibrium=equilibrium)
+
+
+@pytest.mark.parametrize("masked", [False, True])
+def test_summary_matches_probability_matrix(masked: bool) -> None:
+    """Chunked two-pass summaries equal those of the full matrix."""
+    np.random.seed(0)
+    covariate = np.random.normal(size=(50, 3))
+    beta = np.random.normal(size=(3, 400))
+    available = np.random.uniform(size=50) < 0.6 if masked else None
+    quantile = (0.05, 0.5, 0.95)
+
+    # Chunks of 37 draws in the first pass and 3 alternatives in the second
+    summary = summarize_choice_probability(
+        covariate=covariate,
+        beta=beta,
+        quantile=quantile,
+        available=available,
+        memory_budget=30_000
+    )
+
+    choice_probability = compute_choice_probability(
+        covariate=covariate,
+        beta=beta,
+        available=available
+    )
+    np.testing.assert_allclose(summary["mean"], choice_probability.mean(axis=1))
+    np.testing.assert_allclose(
+        summary["quantile"],
+        np.quantile(choice_probability, quantile, axis=1),
+        atol=1e-15
+    )
+    if available is not None:
+        assert np.all(summary["mean"][~available] == 0)
+
+
+@pytest.mark.parametrize(
+    "choice_probability",
+    [
+        np.full(7, 1 / 7),
+        0.5 ** np.arange(200),
+        1 / np.arange(1, 5001),
+        np.array([0.0, 0.0, 1.0, 0.0]),
+        np.array([0.0, 0.3, 0.0, 0.7, 0.0]),
+        np.array([1.0])
+    ],
+    ids=["uniform", "geometric", "zipf", "one_hot", "zeros", "single"]
+)
+def test_alias_table_reproduces_probability(choice_probability: np.ndarray) -> None:
+    """Columns and their aliases add up to the original distribution."""
+    alias_table = make_alias_table(choice_probability=choice_probability)
+    threshold = alias_table["threshold"]
+    num_alternative = threshold.shape[0]
+
+    implied = threshold / num_alternative
+    np.add.at(implied, alias_table["alias"], (1 - threshold) / num_alternative)
+
+    assert np.all((threshold >= 0) & (threshold <= 1))
+    np.testing.assert_allclose(
+        implied,
+        choice_probability / choice_probability.sum(),
+        rtol=1e-10,
+        atol=1e-15
+    )
+
+
+@pytest.mark.parametrize("offset, expect_alias", [(-1, False), (0, True)])
+def test_alias_table_used_from_threshold(offset: int, expect_alias: bool) -> None:
+    """Shared covariates draw from the alias table from ALIAS_THRESHOLD on."""
+    np.random.seed(0)
+    equilibrium = make_equilibrium(
+        num_simulation=1000,
+        num_alternative=simulate.ALIAS_THRESHOLD + offset,
+        num_covariate=2
+    )
+    simulate_choice(seed=1, equilibrium=equilibrium)
+
+    assert (equilibrium._alias_table is not None) == expect_alias
+    assert (equilibrium._cumulative_probability is not None) != expect_alias
+
+
+CACHED = ("_utility", "_choice_probability", "_cumulative_probability", "_alias_table")
+
+
+def _fill_cache(equilibrium: simulate.Equilibrium) -> None:
+    equilibrium.cumulative_probability
+    equilibrium.alias_table
+    assert all(getattr(equilibrium, name) is not None for name in CACHED)
+
+
+def test_reassignment_and_clear_cache_invalidate_derived_arrays() -> None:
+    """New beta or covariates, or clear_cache, drop every cached array."""
+    equilibrium = _make_equilibrium(num_simulation=100, individual_covariate=False)
+    probability = equilibrium.choice_probability.copy()
+
+    _fill_cache(equilibrium=equilibrium)
+    equilibrium.beta = 2 * equilibrium.beta
+    assert all(getattr(equilibrium, name) is None for name in CACHED)
+    np.testing.assert_allclose(
+        equilibrium.choice_probability,
+        compute_choice_probability(
+            covariate=equilibrium.covariate,
+            beta=equilibrium.beta
+        )
+    )
+    assert not np.allclose(equilibrium.choice_probability, probability)
+
+    _fill_cache(equilibrium=equilibrium)
+    equilibrium.covariate = -equilibrium.covariate
+    assert all(getattr(equilibrium, name) is None for name in CACHED)
+
+    # In-place changes are not seen until the cache is cleared
+    _fill_cache(equilibrium=equilibrium)
+    equilibrium.beta[...] = 0
+    assert all(getattr(equilibrium, name) is not None for name in CACHED)
+    equilibrium.clear_cache()
+    assert all(getattr(equilibrium, name) is None for name in CACHED)
+    np.testing.assert_allclose(equilibrium.choice_probability, 1 / 5)